@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Reproducible corpora of version strings and range expressions.
+
+Each function returns a list of ``count`` strings, generated from a fixed
+seed with frequencies loosely following those of npm and PyPI packages:
+mostly releases, some prereleases, rare build metadata.
+"""
+
+import random
+
+
+PRERELEASES = ['alpha', 'alpha.1', 'beta', 'beta.2', 'rc.1', 'rc.2', '0', 'next.3', 'dev.20190101']
+BUILDS = ['build.1', 'build.42', 'sha.5114f85', '20130313144700', 'exp.sha.5114f85']
+
+
+def _release(rnd):
+    major = rnd.choice([0, 0, 1, 1, 1, 2, 2, 3, 4, 5, 7, 10, 16])
+    return major, rnd.randint(0, 20), rnd.randint(0, 30)
+
+
+def npm_versions(count, seed=42):
+    """SemVer strings, as published on npm."""
+    rnd = random.Random(seed)
+    versions = []
+    for _i in range(count):
+        text = '%d.%d.%d' % _release(rnd)
+        if rnd.random() < 0.15:
+            text += '-' + rnd.choice(PRERELEASES)
+        if rnd.random() < 0.05:
+            text += '+' + rnd.choice(BUILDS)
+        versions.append(text)
+    return versions
+
+
+def pypi_versions(count, seed=42):
+    """Loose version strings, which require Version.coerce()."""
+    rnd = random.Random(seed)
+    templates = [
+        '%(major)d.%(minor)d',
+        '%(major)d.%(minor)d',
+        '%(major)d.%(minor)d.%(patch)d',
+        '%(major)d',
+        '%(major)d.%(minor)d.%(patch)d.%(extra)d',
+        '%(major)d.%(minor)drc%(extra)d',
+        '%(major)d.%(minor)d.%(patch)da%(extra)d',
+        '%(major)d.%(minor)d.post%(extra)d',
+        '%(major)d.%(minor)d.%(patch)d.dev%(extra)d',
+    ]
+    versions = []
+    for _i in range(count):
+        major, minor, patch = _release(rnd)
+        versions.append(rnd.choice(templates) % dict(
+            major=major, minor=minor, patch=patch, extra=rnd.randint(0, 5),
+        ))
+    return versions
+
+
+def npm_ranges(count, seed=42):
+    """Range expressions in the NPM syntax, as found in package.json files."""
+    rnd = random.Random(seed)
+    templates = [
+        '^%(v)s', '^%(v)s', '^%(v)s', '^%(v)s',
+        '~%(v)s', '~%(v)s',
+        '%(v)s',
+        '>=%(v)s',
+        '>=%(v)s <%(next)d.0.0',
+        '%(major)d.x',
+        '~%(major)d.%(minor)d',
+        '*',
+        '%(v)s - %(next)d.0.0',
+        '^%(v)s-beta.1',
+        '^%(major)d.0.0 || ^%(next)d.0.0',
+        '>=%(v)s <%(next)d.0.0 || >=%(next)d.1.0',
+    ]
+    ranges = []
+    for _i in range(count):
+        major, minor, patch = _release(rnd)
+        ranges.append(rnd.choice(templates) % dict(
+            v='%d.%d.%d' % (major, minor, patch), major=major, minor=minor, next=major + 1,
+        ))
+    return ranges
+
+
+def simple_ranges(count, seed=42):
+    """Range expressions in the SimpleSpec syntax, as found in requirements."""
+    rnd = random.Random(seed)
+    templates = [
+        '>=%(v)s', '>=%(v)s',
+        '>=%(v)s,<%(next)d.0.0', '>=%(v)s,<%(next)d.0.0',
+        '==%(v)s',
+        '~=%(major)d.%(minor)d',
+        '==%(major)d.%(minor)d.*',
+        '!=%(v)s',
+        '^%(v)s',
+        '~%(major)d.%(minor)d',
+        '>=%(v)s,!=%(major)d.%(minor)d.%(bad)d,<%(next)d.0.0',
+        '<%(v)s-',
+    ]
+    ranges = []
+    for _i in range(count):
+        major, minor, patch = _release(rnd)
+        ranges.append(rnd.choice(templates) % dict(
+            v='%d.%d.%d' % (major, minor, patch), major=major, minor=minor, next=major + 1, bad=patch + 1,
+        ))
+    return ranges
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Measure the memory footprint of Version objects.
+
+Usage: python benchmarks/memory.py [count]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import corpus
+
+from semantic_version import Version
+
+
+def release_strings(count):
+    return ['%d.%d.%d' % (i % 7, i % 13, i) for i in range(count)]
+
+
+def prerelease_strings(count):
+    return ['%d.%d.0-rc.%d+build.%d' % (i % 7, i, i % 5, i) for i in range(count)]
+
+
+def measure(strings):
+    """Return the number of bytes allocated per Version built from strings.
+
+    The input strings are allocated beforehand, and thus not accounted for.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        versions = [Version(text) for text in strings]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Remove the list holding the versions.
+    overhead = sys.getsizeof(versions)
+    return (after - before - overhead) / float(len(versions))
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 100000
+    for name, strings in [
+            ('release', release_strings(count)),
+            ('prerelease+build', prerelease_strings(count)),
+            ('npm', corpus.npm_versions(count)),
+    ]:
+        print("%-20s %8.1f bytes/version" % (name, measure(strings)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
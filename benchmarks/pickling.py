@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Measure the pickled size and round-trip time of versions and specs.
+
+Usage: python benchmarks/pickling.py [count]
+"""
+
+import pickle
+import sys
+import timeit
+
+import corpus
+
+from semantic_version import NpmSpec, SimpleSpec, Version
+
+
+def measure(objects, protocol=pickle.HIGHEST_PROTOCOL):
+    """Return the pickled bytes, and microseconds for a dumps/loads round-trip, per object."""
+    size = len(pickle.dumps(objects, protocol))
+    best = min(timeit.repeat(lambda: pickle.loads(pickle.dumps(objects, protocol)), number=1, repeat=5))
+    return size / float(len(objects)), best * 1e6 / len(objects)
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 10000
+    npm_specs = [NpmSpec(expression) for expression in corpus.npm_ranges(count // 10)]
+    for spec in npm_specs:
+        spec.compile()
+
+    for name, objects in [
+            ('Version', Version.parse_many(corpus.npm_versions(count))),
+            ('SimpleSpec', [SimpleSpec(expression) for expression in corpus.simple_ranges(count // 10)]),
+            ('NpmSpec (compiled)', npm_specs),
+            ('NpmSpec.clause', [spec.clause for spec in npm_specs]),
+    ]:
+        size, seconds = measure(objects)
+        print("%-20s %8.1f bytes/object %8.2f µs/round-trip" % (name, size, seconds))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
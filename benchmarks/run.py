@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Run the benchmark suite.
+
+Usage: python benchmarks/run.py [--quick] [-k PATTERN] [--json FILE] [--compare FILE]
+
+Each benchmark reports its best time over several rounds, as operations per
+second, and the memory allocated per operation (traced by tracemalloc).
+Results saved with --json can be compared to a later run with --compare.
+"""
+
+import argparse
+import collections
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+
+import corpus
+
+from semantic_version import base
+
+
+Case = collections.namedtuple('Case', ['run', 'ops', 'setup'])
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register a benchmark.
+
+    The decorated function receives the corpus size, and returns a Case:
+    ``setup()`` is called before each round, and its result passed to ``run()``,
+    which performs ``ops`` operations.
+    """
+    def register(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return register
+
+
+def _no_setup():
+    return None
+
+
+def _fresh_versions(texts):
+    """Build versions whose precedence keys are not computed yet."""
+    return lambda: base.Version.parse_many(texts)
+
+
+def _primed_versions(texts):
+    def setup():
+        versions = base.Version.parse_many(texts)
+        for version in versions:
+            version._cmp_key
+            version.packed_key
+            version.precedence_key
+        return versions
+    return setup
+
+
+# Versions
+# ========
+
+
+@benchmark('version.parse')
+def bench_version_parse(size):
+    texts = corpus.npm_versions(size)
+
+    def run(_state):
+        parse = base.Version.parse
+        for text in texts:
+            parse(text)
+    return Case(run, len(texts), _no_setup)
+
+
+@benchmark('version.init')
+def bench_version_init(size):
+    texts = corpus.npm_versions(size)
+
+    def run(_state):
+        return [base.Version(text) for text in texts]
+    return Case(run, len(texts), _no_setup)
+
+
+@benchmark('version.parse_many')
+def bench_version_parse_many(size):
+    texts = corpus.npm_versions(size)
+    return Case(lambda _state: base.Version.parse_many(texts), len(texts), _no_setup)
+
+
+@benchmark('version.coerce')
+def bench_version_coerce(size):
+    texts = corpus.pypi_versions(size)
+
+    def run(_state):
+        coerce = base.Version.coerce
+        for text in texts:
+            coerce(text)
+    return Case(run, len(texts), _no_setup)
+
+
+@benchmark('version.coerce_many')
+def bench_version_coerce_many(size):
+    texts = corpus.pypi_versions(size)
+    return Case(lambda _state: base.Version.coerce_many(texts), len(texts), _no_setup)
+
+
+@benchmark('version.coerce (cached)')
+def bench_version_coerce_cached(size):
+    # Lock files and package indexes repeat a few hundred distinct strings.
+    distinct = corpus.pypi_versions(500)
+    texts = [distinct[i % len(distinct)] for i in range(size)]
+
+    def run(_state):
+        base.Version.coerce_cache = base.LRUCache(1024)
+        try:
+            base.Version.coerce_many(texts)
+        finally:
+            base.Version.coerce_cache = None
+    return Case(run, len(texts), _no_setup)
+
+
+@benchmark('version.precedence_key')
+def bench_precedence_key(size):
+    texts = corpus.npm_versions(size)
+
+    def run(versions):
+        for version in versions:
+            version._build_precedence_key(with_build=True)
+    return Case(run, len(texts), _fresh_versions(texts))
+
+
+@benchmark('version.compare')
+def bench_compare(size):
+    texts = corpus.npm_versions(size)
+
+    def run(versions):
+        for first, second in zip(versions, versions[1:]):
+            first < second
+    return Case(run, len(texts) - 1, _primed_versions(texts))
+
+
+@benchmark('version.sort')
+def bench_sort(size):
+    texts = corpus.npm_versions(size)
+    return Case(sorted, len(texts), _fresh_versions(texts))
+
+
+@benchmark('version.to_sortable_bytes')
+def bench_to_sortable_bytes(size):
+    texts = corpus.npm_versions(size)
+
+    def run(versions):
+        for version in versions:
+            version.to_sortable_bytes()
+    return Case(run, len(texts), _fresh_versions(texts))
+
+
+@benchmark('version.from_sortable_bytes')
+def bench_from_sortable_bytes(size):
+    encoded = [version.to_sortable_bytes() for version in base.Version.parse_many(corpus.npm_versions(size))]
+
+    def run(_state):
+        decode = base.Version.from_sortable_bytes
+        for data in encoded:
+            decode(data)
+    return Case(run, len(encoded), _no_setup)
+
+
+# Ranges and specs
+# ================
+
+
+@benchmark('range.match')
+def bench_range_match(size):
+    # Build metadata is not allowed in range targets.
+    targets = base.Version.parse_many(text.split('+')[0] for text in corpus.npm_versions(20, seed=1))
+    operators = [base.Range.OP_LT, base.Range.OP_LTE, base.Range.OP_EQ, base.Range.OP_NEQ, base.Range.OP_GTE]
+    ranges = [base.Range(operator, target) for operator in operators for target in targets]
+    texts = corpus.npm_versions(size // 10)
+
+    def run(versions):
+        for item in ranges:
+            match = item.match
+            for version in versions:
+                match(version)
+    return Case(run, len(ranges) * len(texts), _primed_versions(texts))
+
+
+@benchmark('simple_spec.parse')
+def bench_simple_parse(size):
+    expressions = corpus.simple_ranges(size // 10)
+
+    def run(_state):
+        parse = base.SimpleSpec.Parser.parse
+        for expression in expressions:
+            parse(expression)
+    return Case(run, len(expressions), _no_setup)
+
+
+@benchmark('npm_spec.parse')
+def bench_npm_parse(size):
+    expressions = corpus.npm_ranges(size // 10)
+
+    def run(_state):
+        parse = base.NpmSpec.Parser.parse
+        for expression in expressions:
+            parse(expression)
+    return Case(run, len(expressions), _no_setup)
+
+
+@benchmark('npm_spec.init')
+def bench_npm_init(size):
+    # Manifests repeat a few hundred distinct expressions.
+    distinct = corpus.npm_ranges(500)
+    expressions = [distinct[i % len(distinct)] for i in range(size)]
+
+    def run(_state):
+        return [base.NpmSpec(expression) for expression in expressions]
+    return Case(run, len(expressions), _no_setup)
+
+
+@benchmark('spec.compile')
+def bench_compile(size):
+    expressions = corpus.npm_ranges(size // 10)
+
+    def setup():
+        return [base.NpmSpec(expression) for expression in expressions]
+
+    def run(specs):
+        # Specs share the compiled form of their expression: compile the clauses.
+        for spec in specs:
+            spec.clause.compile()
+    return Case(run, len(expressions), setup)
+
+
+def _compiled_specs(count):
+    specs = [base.NpmSpec(expression) for expression in corpus.npm_ranges(count, seed=2)]
+    for spec in specs:
+        spec.compile()
+    return specs
+
+
+@benchmark('spec.match')
+def bench_spec_match(size):
+    specs = _compiled_specs(20)
+    texts = corpus.npm_versions(size // 2)
+
+    def run(versions):
+        for spec in specs:
+            match = spec.match
+            for version in versions:
+                match(version)
+    return Case(run, len(specs) * len(texts), _primed_versions(texts))
+
+
+@benchmark('spec.matcher')
+def bench_spec_matcher(size):
+    specs = _compiled_specs(20)
+    texts = corpus.npm_versions(size // 2)
+
+    def run(versions):
+        for spec in specs:
+            match = spec.matcher()
+            for version in versions:
+                match(version)
+    return Case(run, len(specs) * len(texts), _primed_versions(texts))
+
+
+@benchmark('spec.filter')
+def bench_spec_filter(size):
+    specs = _compiled_specs(20)
+    texts = corpus.npm_versions(size // 2)
+
+    def run(versions):
+        for spec in specs:
+            list(spec.filter(versions))
+    return Case(run, len(specs) * len(texts), _primed_versions(texts))
+
+
+@benchmark('spec.intersection')
+def bench_spec_intersection(size):
+    specs = _compiled_specs(size // 10)
+
+    def run(_state):
+        for first, second in zip(specs, specs[1:]):
+            first.intersection(second).is_empty()
+    return Case(run, len(specs) - 1, _no_setup)
+
+
+@benchmark('index.select')
+def bench_index_select(size):
+    specs = _compiled_specs(200)
+    index = base.VersionIndex(base.Version.parse_many(corpus.npm_versions(size)))
+
+    def run(_state):
+        for spec in specs:
+            spec.select(index)
+    return Case(run, len(specs), _no_setup)
+
+
+@benchmark('match_matrix')
+def bench_match_matrix(size):
+    specs = _compiled_specs(20)
+    texts = corpus.npm_versions(size // 2)
+    return Case(lambda versions: base.match_matrix(specs, versions), len(specs) * len(texts), _primed_versions(texts))
+
+
+@benchmark('spec_set.match')
+def bench_spec_set_match(size):
+    spec_set = base.SpecSet(enumerate(_compiled_specs(size)))
+    texts = corpus.npm_versions(100)
+
+    def run(versions):
+        for version in versions:
+            spec_set.match(version)
+    return Case(run, len(texts), _primed_versions(texts))
+
+
+# Runner
+# ======
+
+
+def measure(case, rounds):
+    """Return the best time per operation, and the bytes allocated per operation."""
+    timings = []
+    for _i in range(rounds):
+        state = case.setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = timeit.default_timer()
+            case.run(state)
+            timings.append(timeit.default_timer() - start)
+        finally:
+            gc.enable()
+
+    state = case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        case.run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return min(timings) / case.ops, (peak - start) / float(case.ops)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run the python-semanticversion benchmarks.")
+    parser.add_argument('--quick', action='store_true', help="Use smaller corpora and fewer rounds")
+    parser.add_argument('-k', dest='pattern', default='', help="Only run benchmarks whose name contains PATTERN")
+    parser.add_argument('--json', dest='output', help="Save results to a JSON file")
+    parser.add_argument('--compare', help="Compare to results saved with --json")
+    args = parser.parse_args(argv[1:])
+
+    size, rounds = (1000, 3) if args.quick else (10000, 7)
+    reference = {}
+    if args.compare:
+        with open(args.compare) as f:
+            reference = json.load(f)
+
+    # Measure parsing itself, not the cache.
+    base.Version.parse_cache = None
+
+    results = {}
+    for name, func in BENCHMARKS:
+        if args.pattern not in name:
+            continue
+        seconds, allocated = measure(func(size), rounds)
+        results[name] = {'ops_per_sec': 1.0 / seconds, 'bytes_per_op': allocated}
+
+        line = "%-24s %12.0f ops/s %10.3f µs/op %10.1f B/op" % (name, 1.0 / seconds, seconds * 1e6, allocated)
+        if name in reference:
+            line += "   x%.2f" % (reference[name]['ops_per_sec'] * seconds)
+        print(line)
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -3,7 +3,10 @@
 # This code is distributed under the two-clause BSD License.
 
 
-from .base import compare, match, validate, SimpleSpec, NpmSpec, Spec, SpecItem, Version
+from .base import (
+    compare, match, match_matrix, validate,
+    IntervalSet, LRUCache, SimpleSpec, NpmSpec, Spec, SpecItem, SpecSet, Version, VersionIndex,
+)
 
 
 __author__ = "Raphaël Barrois <raphael.barrois+semver@polytechnique.org>"
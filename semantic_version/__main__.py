@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import sys
+
+from .cli import main
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
@@ -2,8 +2,14 @@
 # Copyright (c) The python-semanticversion project
 # This code is distributed under the two-clause BSD License.
 
+import binascii
+import bisect
+import collections
 import functools
+import heapq
 import re
+import struct
+import threading
 import warnings
 
 
@@ -14,6 +20,171 @@ def _has_leading_zero(value):
             and value != '0')
 
 
+# Sortable binary encoding of versions: memcmp order follows semver precedence.
+# A version is encoded as its major, minor and patch numbers, then its prerelease
+# section (or _SORTABLE_RELEASE for a release), then its build section.
+# Each number is encoded as its length in bytes, then its big-endian bytes.
+# Sections hold identifiers, numeric ones first, and end with _SORTABLE_END.
+_SORTABLE_END = b'\x00'
+_SORTABLE_NUMERIC = b'\x01'
+_SORTABLE_ALPHA = b'\x02'
+# Larger than the first byte of any build section.
+_SORTABLE_BUILD_MAX = b'\x03'
+_SORTABLE_RELEASE = b'\xff'
+_SORTABLE_END_BYTE, _SORTABLE_NUMERIC_BYTE, _SORTABLE_ALPHA_BYTE, _SORTABLE_RELEASE_BYTE = bytearray(
+    _SORTABLE_END + _SORTABLE_NUMERIC + _SORTABLE_ALPHA + _SORTABLE_RELEASE)
+_SORTABLE_ALPHA_RE = re.compile(r'[0-9a-zA-Z-]+\Z')
+
+
+def _legacy_state(state):
+    """Merge the default pickle state of previous releases, a __dict__ or a (__dict__, slots) pair."""
+    if isinstance(state, dict):
+        return state
+    merged = {}
+    for part in state:
+        merged.update(part or {})
+    return merged
+
+
+def _encode_number(value):
+    if not value:
+        return b'\x00'
+    digits = '%x' % value
+    if len(digits) % 2:
+        digits = '0' + digits
+    data = binascii.unhexlify(digits)
+    if len(data) > 255:
+        raise ValueError("Number too large for a sortable encoding: %d" % value)
+    return struct.pack('B', len(data)) + data
+
+
+def _encode_identifiers(identifiers):
+    parts = []
+    for part in identifiers:
+        if part.isdigit() and not _has_leading_zero(part):
+            parts.append(_SORTABLE_NUMERIC + _encode_number(int(part)))
+        else:
+            # Build identifiers may be numbers with leading zeroes.
+            parts.append(_SORTABLE_ALPHA + part.encode('ascii') + _SORTABLE_END)
+    parts.append(_SORTABLE_END)
+    return b''.join(parts)
+
+
+def _decode_number(data, position):
+    """Decode the number starting at data[position]; return it with the next position."""
+    length = data[position]
+    stop = position + 1 + length
+    if not length:
+        return 0, stop
+    elif stop > len(data) or not data[position + 1]:
+        # Truncated, or not the shortest encoding.
+        raise ValueError("Invalid number at byte %d" % position)
+    elif length == 1:
+        return data[position + 1], stop
+    return int(binascii.hexlify(data[position + 1:stop]), 16), stop
+
+
+def _decode_identifiers(data, position):
+    """Decode the section starting at data[position]; return it with the next position."""
+    identifiers = []
+    while True:
+        tag = data[position]
+        if tag == _SORTABLE_END_BYTE:
+            return tuple(identifiers), position + 1
+        elif tag == _SORTABLE_NUMERIC_BYTE:
+            value, position = _decode_number(data, position + 1)
+            identifiers.append('%d' % value)
+        elif tag == _SORTABLE_ALPHA_BYTE:
+            stop = data.index(_SORTABLE_END, position + 1)
+            part = data[position + 1:stop].decode('ascii')
+            if not _SORTABLE_ALPHA_RE.match(part):
+                raise ValueError("Invalid identifier %r at byte %d" % (part, position))
+            elif part.isdigit() and not _has_leading_zero(part):
+                # Numbers are encoded as numeric identifiers.
+                raise ValueError("Invalid alphanumeric identifier %r at byte %d" % (part, position))
+            identifiers.append(part)
+            position = stop + 1
+        else:
+            raise ValueError("Invalid identifier tag %d at byte %d" % (tag, position))
+
+
+def _decode_sortable(data):
+    """Decode sortable bytes into (major, minor, patch, prerelease, build)."""
+    data = bytearray(data)
+    try:
+        major, position = _decode_number(data, 0)
+        minor, position = _decode_number(data, position)
+        patch, position = _decode_number(data, position)
+        if data[position] == _SORTABLE_RELEASE_BYTE:
+            prerelease, position = (), position + 1
+        else:
+            prerelease, position = _decode_identifiers(data, position)
+            if not prerelease:
+                raise ValueError("Invalid empty prerelease section")
+        build, position = _decode_identifiers(data, position)
+    except (IndexError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid sortable version bytes %r: %s" % (bytes(data), e))
+    if position != len(data):
+        raise ValueError("Invalid trailing bytes in sortable version %r" % bytes(data))
+    return major, minor, patch, prerelease, build
+
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):
+    """A bounded, thread-safe mapping with least-recently-used eviction.
+
+    Used to memoize parsing results; lookups are counted in ``hits`` and ``misses``.
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 0:
+            raise ValueError("Invalid cache size: %r" % maxsize)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            # Re-insert the key to mark it as the most recently used.
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return '<LRUCache: %d/%d>' % (len(self._data), self.maxsize)
+
+
 class MaxIdentifier(object):
     __slots__ = []
 
@@ -23,6 +194,13 @@ class MaxIdentifier(object):
     def __eq__(self, other):
         return isinstance(other, self.__class__)
 
+    def __hash__(self):
+        return hash(MaxIdentifier)
+
+
+# Shared prerelease precedence key for all non-prerelease versions.
+_RELEASE_KEY = (MaxIdentifier(),)
+
 
 @functools.total_ordering
 class NumericIdentifier(object):
@@ -39,6 +217,9 @@ class NumericIdentifier(object):
             return self.value == other.value
         return NotImplemented
 
+    def __hash__(self):
+        return hash((NumericIdentifier, self.value))
+
     def __lt__(self, other):
         if isinstance(other, MaxIdentifier):
             return True
@@ -65,6 +246,9 @@ class AlphaIdentifier(object):
             return self.value == other.value
         return NotImplemented
 
+    def __hash__(self):
+        return hash((AlphaIdentifier, self.value))
+
     def __lt__(self, other):
         if isinstance(other, MaxIdentifier):
             return True
@@ -77,9 +261,40 @@ class AlphaIdentifier(object):
 
 
 class Version(object):
+    """An immutable SemVer version."""
+
+    __slots__ = [
+        'major',
+        'minor',
+        'patch',
+        'prerelease',
+        'build',
+        'partial',
+        '_cmp_precedence_key',
+        '_sort_precedence_key',
+        '_packed_precedence_key',
+    ]
 
     version_re = re.compile(r'^(\d+)\.(\d+)\.(\d+)(?:-([0-9a-zA-Z.-]+))?(?:\+([0-9a-zA-Z.-]+))?$')
     partial_version_re = re.compile(r'^(\d+)(?:\.(\d+)(?:\.(\d+))?)?(?:-([0-9a-zA-Z.-]*))?(?:\+([0-9a-zA-Z.-]*))?$')
+    # Only matches valid versions: no leading zeroes, no empty identifiers.
+    strict_version_re = re.compile(
+        r'^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)'
+        r'(?:-((?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*))*))?'
+        r'(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$'
+    )
+
+    # Leading numbers of coerce() input, and the characters it replaces
+    coerce_re = re.compile(r'^(\d+)(?:\.(\d+)(?:\.(\d+))?)?(.*)$', re.DOTALL)
+    coerce_invalid_re = re.compile(r'[^a-zA-Z0-9+.-]')
+
+    # Optional LRUCache of parsed components, keyed on the version string;
+    # disabled by default.
+    parse_cache = None
+
+    # Optional LRUCache of coerce() results, keyed on the version string;
+    # disabled by default.
+    coerce_cache = None
 
     def __init__(
             self,
@@ -110,19 +325,63 @@ class Version(object):
                 build = tuple(build or ())
             self._validate_kwargs(major, minor, patch, prerelease, build, partial)
 
-        self.major = major
-        self.minor = minor
-        self.patch = patch
-        self.prerelease = prerelease
-        self.build = build
+        self._setup(major, minor, patch, prerelease, build, partial)
 
-        self.partial = partial
+    @classmethod
+    def _from_parts(cls, major, minor, patch, prerelease, build, partial=False):
+        """Build a Version from already validated components."""
+        if cls.__init__ != Version.__init__:
+            # Subclasses may set their own state in __init__.
+            return cls(major=major, minor=minor, patch=patch, prerelease=prerelease, build=build, partial=partial)
+        version = cls.__new__(cls)
+        version._setup(major, minor, patch, prerelease, build, partial)
+        return version
 
-        # Cached precedence keys
+    def _setup(self, major, minor, patch, prerelease, build, partial):
+        # Version objects are immutable: bypass our own __setattr__.
+        (
+            set_major, set_minor, set_patch, set_prerelease, set_build,
+            set_partial, set_cmp_precedence_key, set_sort_precedence_key, set_packed_precedence_key,
+        ) = _VERSION_SLOT_SETTERS
+        set_major(self, major)
+        set_minor(self, minor)
+        set_patch(self, patch)
+        set_prerelease(self, prerelease)
+        set_build(self, build)
+
+        set_partial(self, partial)
+
+        # Cached precedence keys, built on first use
         # _cmp_precedence_key is used for semver-precedence comparison
-        self._cmp_precedence_key = self._build_precedence_key(with_build=False)
+        set_cmp_precedence_key(self, None)
         # _sort_precedence_key is used for self.precedence_key, esp. for sorted(...)
-        self._sort_precedence_key = self._build_precedence_key(with_build=True)
+        set_sort_precedence_key(self, None)
+        # _packed_precedence_key is used for fast comparisons, see packed_key
+        set_packed_precedence_key(self, None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Cannot set %r: %s objects are immutable." % (name, self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("Cannot delete %r: %s objects are immutable." % (name, self.__class__.__name__))
+
+    def __getstate__(self):
+        # Precedence keys are rebuilt on unpickling.
+        return (self.major, self.minor, self.patch, self.prerelease, self.build, self.partial)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict) or len(state) == 2:
+            # Pickled by a previous release
+            state = _legacy_state(state)
+            state = tuple(state[name] for name in ('major', 'minor', 'patch', 'prerelease', 'build', 'partial'))
+        self._setup(*state)
+
+    def __copy__(self):
+        # Immutable
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @classmethod
     def _coerce(cls, value, allow_none=False):
@@ -131,92 +390,45 @@ class Version(object):
         return int(value)
 
     def next_major(self):
+        # Components are already valid: skip the checks of __init__.
+        build = None if self.partial else ()
         if self.prerelease and self.minor == self.patch == 0:
-            return self.__class__(
-                major=self.major,
-                minor=0,
-                patch=0,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, 0, 0, (), build, self.partial)
         else:
-            return self.__class__(
-                major=self.major + 1,
-                minor=0,
-                patch=0,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major + 1, 0, 0, (), build, self.partial)
 
     def next_minor(self):
+        build = None if self.partial else ()
         if self.prerelease and self.patch == 0:
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=0,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, self.minor, 0, (), build, self.partial)
         else:
-            return self.__class__(
-                major=self.major,
-                minor=self.minor + 1,
-                patch=0,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, self.minor + 1, 0, (), build, self.partial)
 
     def next_patch(self):
+        build = None if self.partial else ()
         if self.prerelease:
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=self.patch,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, self.minor, self.patch, (), build, self.partial)
         else:
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=self.patch + 1,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, self.minor, self.patch + 1, (), build, self.partial)
 
     def truncate(self, level='patch'):
         """Return a new Version object, truncated up to the selected level."""
+        build = None if self.partial else ()
         if level == 'build':
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=self.patch,
-                prerelease=self.prerelease,
-                build=self.build,
-                partial=self.partial,
+            return self._from_parts(
+                self.major, self.minor, self.patch, self.prerelease or (), self.build, self.partial,
             )
         elif level == 'prerelease':
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=self.patch,
-                prerelease=self.prerelease,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, self.minor, self.patch, self.prerelease or (), build, self.partial)
         elif level == 'patch':
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=self.patch,
-                partial=self.partial,
-            )
+            return self._from_parts(self.major, self.minor, self.patch, (), build, self.partial)
         elif level == 'minor':
-            return self.__class__(
-                major=self.major,
-                minor=self.minor,
-                patch=None if self.partial else 0,
-                partial=self.partial,
+            return self._from_parts(
+                self.major, self.minor, None if self.partial else 0, (), build, self.partial,
             )
         elif level == 'major':
-            return self.__class__(
-                major=self.major,
-                minor=None if self.partial else 0,
-                patch=None if self.partial else 0,
-                partial=self.partial,
+            return self._from_parts(
+                self.major, None if self.partial else 0, None if self.partial else 0, (), build, self.partial,
             )
         else:
             raise ValueError("Invalid truncation level `%s`." % level)
@@ -242,64 +454,103 @@ class Version(object):
             >>> Version.coerce('0.1+2-3+4_5')
             Version(0, 1, 0, (), ('2-3', '4-5'))
         """
-        base_re = re.compile(r'^\d+(?:\.\d+(?:\.\d+)?)?')
+        cache = cls.coerce_cache
+        if cache is None:
+            return cls._coerce_string(version_string, partial)
+
+        key = (cls, version_string, partial)
+        version = cache.get(key)
+        if version is None:
+            version = cls._coerce_string(version_string, partial)
+            cache.put(key, version)
+        return version
+
+    @classmethod
+    def coerce_many(cls, version_strings, errors='raise'):
+        """Coerce an iterable of version strings into Version objects.
+
+        Args:
+            version_strings (iterable of str), the strings to coerce
+            errors (str), how to handle strings which can't be coerced: 'raise'
+                the first ValueError, 'skip' them, or 'collect' them.
+
+        Returns:
+            A list of Version; with errors='collect', a (versions, errors) tuple,
+            where errors lists (position, version_string, ValueError) tuples.
+        """
+        if errors not in ('raise', 'skip', 'collect'):
+            raise ValueError("Invalid errors mode: %r" % errors)
+
+        coerce = cls.coerce
+        versions = []
+        append = versions.append
+        failures = []
+
+        for position, version_string in enumerate(version_strings):
+            try:
+                append(coerce(version_string))
+            except ValueError as e:
+                if errors == 'raise':
+                    raise
+                failures.append((position, version_string, e))
+
+        if errors == 'collect':
+            return versions, failures
+        return versions
 
-        match = base_re.match(version_string)
+    @classmethod
+    def _coerce_string(cls, version_string, partial=False):
+        match = cls.coerce_re.match(version_string)
         if not match:
             raise ValueError(
                 "Version string lacks a numerical component: %r"
                 % version_string
             )
 
-        version = version_string[:match.end()]
-        if not partial:
-            # We need a not-partial version.
-            while version.count('.') < 2:
-                version += '.0'
-
-        # Strip leading zeros in components
-        # Version is of the form nn, nn.pp or nn.pp.qq
-        version = '.'.join(
-            # If the part was '0', we end up with an empty string.
-            part.lstrip('0') or '0'
-            for part in version.split('.')
-        )
-
-        if match.end() == len(version_string):
-            return cls(version, partial=partial)
-
-        rest = version_string[match.end():]
-
-        # Cleanup the 'rest'
-        rest = re.sub(r'[^a-zA-Z0-9+.-]', '-', rest)
-
-        if rest[0] == '+':
-            # A 'build' component
-            prerelease = ''
-            build = rest[1:]
-        elif rest[0] == '.':
-            # An extra version component, probably 'build'
-            prerelease = ''
-            build = rest[1:]
-        elif rest[0] == '-':
-            rest = rest[1:]
-            if '+' in rest:
+        # int() strips leading zeros from components.
+        major, minor, patch, rest = match.groups()
+        major = int(major)
+        minor = None if minor is None else int(minor)
+        patch = None if patch is None else int(patch)
+
+        prerelease = build = ''
+        if rest:
+            # Cleanup the 'rest'
+            rest = cls.coerce_invalid_re.sub('-', rest)
+
+            if rest[0] == '+':
+                # A 'build' component
+                build = rest[1:]
+            elif rest[0] == '.':
+                # An extra version component, probably 'build'
+                build = rest[1:]
+            elif rest[0] == '-':
+                rest = rest[1:]
+                if '+' in rest:
+                    prerelease, build = rest.split('+', 1)
+                else:
+                    prerelease = rest
+            elif '+' in rest:
                 prerelease, build = rest.split('+', 1)
             else:
-                prerelease, build = rest, ''
-        elif '+' in rest:
-            prerelease, build = rest.split('+', 1)
-        else:
-            prerelease, build = rest, ''
+                prerelease = rest
 
-        build = build.replace('+', '.')
+            build = build.replace('+', '.')
 
-        if prerelease:
-            version = '%s-%s' % (version, prerelease)
-        if build:
-            version = '%s+%s' % (version, build)
+        if partial:
+            version = '.'.join('%d' % part for part in (major, minor, patch) if part is not None)
+            if prerelease:
+                version = '%s-%s' % (version, prerelease)
+            if build:
+                version = '%s+%s' % (version, build)
+            return cls(version, partial=partial)
 
-        return cls(version, partial=partial)
+        # The cleanup only leaves valid characters: only check identifiers.
+        prerelease = tuple(prerelease.split('.')) if prerelease else ()
+        build = tuple(build.split('.')) if build else ()
+        cls._validate_identifiers(prerelease, allow_leading_zeroes=False)
+        cls._validate_identifiers(build, allow_leading_zeroes=True)
+        return cls._from_parts(major, minor or 0, patch or 0, prerelease, build)
 
     @classmethod
     def parse(cls, version_string, partial=False, coerce=False):
@@ -312,6 +563,83 @@ class Version(object):
             coerce (bool), whether to try to map the passed in string into a
                 valid Version.
         """
+        cache = cls.parse_cache
+        if cache is None:
+            return cls._parse(version_string, partial)
+
+        key = (cls, version_string, partial)
+        parts = cache.get(key)
+        if parts is None:
+            parts = cls._parse(version_string, partial)
+            cache.put(key, parts)
+        return parts
+
+    @classmethod
+    def parse_many(cls, version_strings, errors='raise'):
+        """Build Version objects from an iterable of version strings.
+
+        Args:
+            version_strings (iterable of str), the strings to parse
+            errors (str), how to handle invalid strings: 'raise' the first
+                ValueError, 'skip' them, or 'collect' them.
+
+        Returns:
+            A list of Version; with errors='collect', a (versions, errors) tuple,
+            where errors lists (position, version_string, ValueError) tuples.
+        """
+        if errors not in ('raise', 'skip', 'collect'):
+            raise ValueError("Invalid errors mode: %r" % errors)
+
+        match = cls.strict_version_re.match
+        from_parts = cls._from_parts
+        versions = []
+        append = versions.append
+        failures = []
+
+        for position, version_string in enumerate(version_strings):
+            m = match(version_string) if version_string else None
+            if m is None:
+                # Let the regular parser report the error.
+                try:
+                    append(from_parts(*cls._parse(version_string)))
+                except ValueError as e:
+                    if errors == 'raise':
+                        raise
+                    failures.append((position, version_string, e))
+                continue
+
+            major, minor, patch, prerelease, build = m.groups()
+            append(from_parts(
+                int(major),
+                int(minor),
+                int(patch),
+                tuple(prerelease.split('.')) if prerelease else (),
+                tuple(build.split('.')) if build else (),
+            ))
+
+        if errors == 'collect':
+            return versions, failures
+        return versions
+
+    @classmethod
+    def _parse(cls, version_string, partial=False):
+        if not partial and version_string:
+            # Valid versions only need a single regexp match.
+            match = cls.strict_version_re.match(version_string)
+            if match is not None:
+                major, minor, patch, prerelease, build = match.groups()
+                return (
+                    int(major),
+                    int(minor),
+                    int(patch),
+                    tuple(prerelease.split('.')) if prerelease else (),
+                    tuple(build.split('.')) if build else (),
+                )
+        return cls._parse_checked(version_string, partial)
+
+    @classmethod
+    def _parse_checked(cls, version_string, partial=False):
+        """Parse a version string step by step, reporting the first invalid part."""
         if not version_string:
             raise ValueError('Invalid empty version string: %r' % version_string)
 
@@ -433,9 +761,7 @@ class Version(object):
                 for part in self.prerelease
             )
         else:
-            prerelease_key = (
-                MaxIdentifier(),
-            )
+            prerelease_key = _RELEASE_KEY
 
         if not with_build:
             return (
@@ -458,9 +784,64 @@ class Version(object):
             build_key,
         )
 
+    @property
+    def _cmp_key(self):
+        key = self._cmp_precedence_key
+        if key is None:
+            key = self._build_precedence_key(with_build=False)
+            object.__setattr__(self, '_cmp_precedence_key', key)
+        return key
+
     @property
     def precedence_key(self):
-        return self._sort_precedence_key
+        key = self._sort_precedence_key
+        if key is None:
+            key = self._build_precedence_key(with_build=True)
+            object.__setattr__(self, '_sort_precedence_key', key)
+        return key
+
+    @property
+    def packed_key(self):
+        """An integer ordering versions by major, minor, patch, then releases after prereleases.
+
+        Versions with different packed keys compare like those keys; versions
+        with the same packed key must be compared through their precedence keys.
+        None for partial versions, or versions whose minor or patch exceed 64 bits.
+        """
+        key = self._packed_key
+        return None if key is False else key
+
+    @property
+    def _packed_key(self):
+        """The packed_key, or False if the version can't be packed."""
+        key = self._packed_precedence_key
+        if key is None:
+            if self.partial or self.minor >> 64 or self.patch >> 64:
+                key = False
+            else:
+                key = (self.major << 129) | (self.minor << 65) | (self.patch << 1) | (not self.prerelease)
+            object.__setattr__(self, '_packed_precedence_key', key)
+        return key
+
+    def to_sortable_bytes(self):
+        """Encode the version as bytes, whose memcmp order follows semver precedence."""
+        if self.partial:
+            raise ValueError("Cannot encode partial version %r" % self)
+        return b''.join([
+            _encode_number(self.major),
+            _encode_number(self.minor),
+            _encode_number(self.patch),
+            _encode_identifiers(self.prerelease) if self.prerelease else _SORTABLE_RELEASE,
+            _encode_identifiers(self.build),
+        ])
+
+    @classmethod
+    def from_sortable_bytes(cls, data):
+        """Decode a Version from the output of to_sortable_bytes()."""
+        major, minor, patch, prerelease, build = _decode_sortable(data)
+        cls._validate_identifiers(prerelease, allow_leading_zeroes=False)
+        cls._validate_identifiers(build, allow_leading_zeroes=True)
+        return cls._from_parts(major, minor, patch, prerelease, build)
 
     def __cmp__(self, other):
         if not isinstance(other, self.__class__):
@@ -493,22 +874,42 @@ class Version(object):
     def __lt__(self, other):
         if not isinstance(other, self.__class__):
             return NotImplemented
-        return self._cmp_precedence_key < other._cmp_precedence_key
+        packed = self._packed_precedence_key or self._packed_key
+        other_packed = other._packed_precedence_key or other._packed_key
+        if packed != other_packed and packed is not False and other_packed is not False:
+            return packed < other_packed
+        return self._cmp_key < other._cmp_key
 
     def __le__(self, other):
         if not isinstance(other, self.__class__):
             return NotImplemented
-        return self._cmp_precedence_key <= other._cmp_precedence_key
+        packed = self._packed_precedence_key or self._packed_key
+        other_packed = other._packed_precedence_key or other._packed_key
+        if packed != other_packed and packed is not False and other_packed is not False:
+            return packed <= other_packed
+        return self._cmp_key <= other._cmp_key
 
     def __gt__(self, other):
         if not isinstance(other, self.__class__):
             return NotImplemented
-        return self._cmp_precedence_key > other._cmp_precedence_key
+        packed = self._packed_precedence_key or self._packed_key
+        other_packed = other._packed_precedence_key or other._packed_key
+        if packed != other_packed and packed is not False and other_packed is not False:
+            return packed > other_packed
+        return self._cmp_key > other._cmp_key
 
     def __ge__(self, other):
         if not isinstance(other, self.__class__):
             return NotImplemented
-        return self._cmp_precedence_key >= other._cmp_precedence_key
+        packed = self._packed_precedence_key or self._packed_key
+        other_packed = other._packed_precedence_key or other._packed_key
+        if packed != other_packed and packed is not False and other_packed is not False:
+            return packed >= other_packed
+        return self._cmp_key >= other._cmp_key
+
+
+# Slot descriptors' setters, faster than object.__setattr__ for Version._setup.
+_VERSION_SLOT_SETTERS = tuple(getattr(Version, name).__set__ for name in Version.__slots__)
 
 
 class SpecItem(object):
@@ -619,6 +1020,29 @@ def validate(version_string):
 DEFAULT_SYNTAX = 'simple'
 
 
+class _ParsedExpression(object):
+    """The clause of a spec expression, and its compiled IntervalSet.
+
+    Shared by all specs built from the same expression through the
+    BaseSpec.parse_cache: the clause is only compiled once.
+    """
+    __slots__ = ['clause', 'compiled']
+
+    def __init__(self, clause):
+        self.clause = clause
+        self.compiled = None
+
+    def get_compiled(self):
+        """Return the compiled IntervalSet, or False if the clause can't be compiled."""
+        if self.compiled is None:
+            try:
+                self.compiled = self.clause.compile()
+            except NotImplementedError:
+                # Custom clauses may not support compilation.
+                self.compiled = False
+        return self.compiled
+
+
 class BaseSpec(object):
     """A specification of compatible versions.
 
@@ -635,6 +1059,11 @@ class BaseSpec(object):
     """
     SYNTAXES = {}
 
+    # LRUCache of parsed expressions, keyed on (spec class, expression).
+    # Clauses are immutable, and can be shared between specs, along with
+    # their compiled IntervalSet.
+    parse_cache = LRUCache(maxsize=1024)
+
     @classmethod
     def register_syntax(cls, subclass):
         syntax = subclass.SYNTAX
@@ -651,7 +1080,32 @@ class BaseSpec(object):
     def __init__(self, expression):
         super(BaseSpec, self).__init__()
         self.expression = expression
-        self.clause = self._parse_to_clause(expression)
+        self._parsed = self._get_parsed(expression)
+        self.clause = self._parsed.clause
+        self._compiled = None
+        self._matcher = None
+
+    def __reduce__(self):
+        # Only ship the expression: parsing it again hits the parse_cache.
+        return (self.__class__, (self.expression,))
+
+    def __setstate__(self, state):
+        # Pickled by a previous release: parse the expression again.
+        self.__init__(_legacy_state(state)['expression'])
+
+    @classmethod
+    def _get_parsed(cls, expression):
+        """Parse an expression to a _ParsedExpression, through the parse_cache if enabled."""
+        cache = cls.parse_cache
+        if cache is None:
+            return _ParsedExpression(cls._parse_to_clause(expression))
+
+        key = (cls, expression)
+        parsed = cache.get(key)
+        if parsed is None:
+            parsed = _ParsedExpression(cls._parse_to_clause(expression))
+            cache.put(key, parsed)
+        return parsed
 
     @classmethod
     def parse(cls, expression, syntax=DEFAULT_SYNTAX):
@@ -665,16 +1119,86 @@ class BaseSpec(object):
 
     def filter(self, versions):
         """Filter an iterable of versions satisfying the Spec."""
-        for version in versions:
-            if self.match(version):
-                yield version
+        if isinstance(versions, VersionIndex):
+            compiled = self._get_compiled()
+            if compiled is not None:
+                return versions.filter(compiled)
+        return (version for version in versions if self.match(version))
+
+    def compile(self):
+        """Compile the Spec into an IntervalSet, used for matching versions."""
+        compiled = self._get_compiled()
+        if compiled is None:
+            # Raise the actual error.
+            return self.clause.compile()
+        return compiled
+
+    def _get_compiled(self):
+        """Return the compiled IntervalSet, or None if the clause can't be compiled."""
+        if self._compiled is None:
+            parsed = self._parsed
+            if parsed.clause is not self.clause:
+                # The clause was replaced: don't share its compiled form.
+                parsed = self._parsed = _ParsedExpression(self.clause)
+            self._compiled = parsed.get_compiled()
+        return self._compiled or None
+
+    def intersection(self, *others):
+        """Return the IntervalSet of versions matching this spec and all others.
+
+        Others may be specs, or IntervalSets.
+        """
+        result = self.compile()
+        for other in others:
+            result &= _as_interval_set(other)
+        return result
+
+    def union(self, *others):
+        """Return the IntervalSet of versions matching this spec or any other.
+
+        Others may be specs, or IntervalSets.
+        """
+        result = self.compile()
+        for other in others:
+            result |= _as_interval_set(other)
+        return result
+
+    def is_empty(self):
+        """Whether no version can match the spec."""
+        return self.compile().is_empty()
+
+    def is_subset(self, other):
+        """Whether all versions matching the spec match another spec or IntervalSet."""
+        return self.compile().is_subset(_as_interval_set(other))
+
+    def matcher(self):
+        """Return a function checking whether a Version satisfies the Spec.
+
+        It is generated from the compiled spec, as straight comparisons of
+        precedence keys to constants; the function is cached.
+        """
+        if self._matcher is None:
+            compiled = self._get_compiled()
+            if compiled is None:
+                self._matcher = self.clause.match
+            else:
+                self._matcher = _generate_matcher(compiled, self.clause.match)
+        return self._matcher
 
     def match(self, version):
         """Check whether a Version satisfies the Spec."""
-        return self.clause.match(version)
+        compiled = self._get_compiled()
+        if compiled is None or version.partial:
+            # Partial versions have no precedence key.
+            return self.clause.match(version)
+        return compiled.match(version)
 
     def select(self, versions):
         """Select the best compatible version among an iterable of options."""
+        if isinstance(versions, VersionIndex):
+            compiled = self._get_compiled()
+            if compiled is not None:
+                return versions.select(compiled)
         options = list(self.filter(versions))
         if options:
             return max(options)
@@ -687,13 +1211,23 @@ class BaseSpec(object):
         return False
 
     def __eq__(self, other):
-        if not isinstance(other, self.__class__):
+        if not isinstance(other, BaseSpec):
             return NotImplemented
 
-        return self.clause == other.clause
+        # Specs are equal if they match the same versions.
+        compiled, other_compiled = self._get_compiled(), other._get_compiled()
+        if compiled is None or other_compiled is None:
+            return self.clause == other.clause
+        return compiled == other_compiled
+
+    def __ne__(self, other):
+        return not self == other
 
     def __hash__(self):
-        return hash(self.clause)
+        compiled = self._get_compiled()
+        if compiled is None:
+            return hash(self.clause)
+        return hash(compiled)
 
     def __str__(self):
         return self.expression
@@ -736,6 +1270,10 @@ class Clause(object):
     def simplify(self):
         return self
 
+    def compile(self):
+        """Convert the clause into an IntervalSet of matching versions."""
+        raise NotImplementedError()
+
 
 class AnyOf(Clause):
     __slots__ = ['clauses']
@@ -744,9 +1282,18 @@ class AnyOf(Clause):
         super(AnyOf, self).__init__()
         self.clauses = frozenset(clauses)
 
+    def __reduce__(self):
+        return (self.__class__, tuple(self.clauses))
+
     def match(self, version):
         return any(c.match(version) for c in self.clauses)
 
+    def compile(self):
+        result = IntervalSet()
+        for clause in self.clauses:
+            result |= clause.compile()
+        return result
+
     def simplify(self):
         subclauses = set()
         for clause in self.clauses:
@@ -757,9 +1304,7 @@ class AnyOf(Clause):
                 continue
             else:
                 subclauses.add(simplified)
-        if len(subclauses) == 1:
-            return subclauses.pop()
-        return AnyOf(*subclauses)
+        return _minimize_clauses(AnyOf, subclauses)
 
     def __hash__(self):
         return hash((AnyOf, self.clauses))
@@ -807,9 +1352,18 @@ class AllOf(Clause):
         super(AllOf, self).__init__()
         self.clauses = frozenset(clauses)
 
+    def __reduce__(self):
+        return (self.__class__, tuple(self.clauses))
+
     def match(self, version):
         return all(clause.match(version) for clause in self.clauses)
 
+    def compile(self):
+        result = IntervalSet.everything()
+        for clause in self.clauses:
+            result &= clause.compile()
+        return result
+
     def simplify(self):
         subclauses = set()
         for clause in self.clauses:
@@ -820,9 +1374,7 @@ class AllOf(Clause):
                 continue
             else:
                 subclauses.add(simplified)
-        if len(subclauses) == 1:
-            return subclauses.pop()
-        return AllOf(*subclauses)
+        return _minimize_clauses(AllOf, subclauses)
 
     def __hash__(self):
         return hash((AllOf, self.clauses))
@@ -865,6 +1417,102 @@ class AllOf(Clause):
         yield ')'
 
 
+def _minimize_clauses(kind, clauses):
+    """Build the smallest AnyOf/AllOf matching the same versions as ``kind(*clauses)``.
+
+    Empty and universal combinations become Never() and Always(); clauses
+    implied by the others are dropped, and neighbouring AnyOf alternatives
+    are merged into a single AllOf where their union allows it.
+    """
+    try:
+        compiled = dict((clause, clause.compile()) for clause in clauses)
+    except NotImplementedError:
+        # Custom clauses can't be compared.
+        compiled = None
+
+    if compiled is not None:
+        combine = IntervalSet.__or__ if kind is AnyOf else IntervalSet.__and__
+        neutral = IntervalSet() if kind is AnyOf else IntervalSet.everything()
+
+        clauses = sorted(clauses, key=repr)
+        if kind is AnyOf:
+            clauses = _merge_alternatives(clauses, compiled)
+
+        # suffixes[i] combines clauses[i:]; a clause is implied if the kept
+        # clauses before it and all clauses after it already make the total.
+        suffixes = [neutral]
+        for clause in reversed(clauses):
+            suffixes.append(combine(compiled[clause], suffixes[-1]))
+        suffixes.reverse()
+
+        total = suffixes[0]
+        if total.is_empty():
+            return Never()
+        elif total == IntervalSet.everything():
+            return Always()
+
+        kept = []
+        prefix = neutral
+        for index, clause in enumerate(clauses):
+            if combine(prefix, suffixes[index + 1]) == total:
+                continue
+            kept.append(clause)
+            prefix = combine(prefix, compiled[clause])
+        clauses = kept
+
+    if len(clauses) == 1:
+        return next(iter(clauses))
+    return kind(*clauses)
+
+
+def _merge_alternatives(clauses, compiled):
+    """Merge neighbouring alternatives whose union is the intersection of some of their ranges.
+
+    ``>=1.0.0,<2.0.0 || >=2.0.0,<3.0.0`` becomes ``>=1.0.0,<3.0.0``; ``compiled``
+    maps each clause to its IntervalSet, and is updated with merged clauses.
+    Alternatives are sorted on their lowest version, and merged with their neighbours in a single pass.
+    """
+    def low_key(clause):
+        lows = [layer[0].low for layer in (compiled[clause].releases, compiled[clause].prereleases) if layer]
+        return min(_MIN_KEY if low is None else low for low in lows) if lows else _MIN_KEY
+
+    merged = []
+    for clause in sorted(clauses, key=low_key):
+        # A merged alternative may now reach the ones before it; a
+        # prerelease-only alternative may lie between two mergeable ones.
+        while merged:
+            for index in range(len(merged) - 1, max(len(merged) - 3, -1), -1):
+                candidate = _merge_pair(merged[index], clause, compiled)
+                if candidate is not None:
+                    del merged[index]
+                    clause = candidate
+                    break
+            else:
+                break
+        merged.append(clause)
+    return merged
+
+
+def _merge_pair(first, second, compiled):
+    """Return a single clause matching the union of two alternatives, or None."""
+    union = compiled[first] | compiled[second]
+    # Keep the ranges containing both alternatives.
+    candidates = []
+    for clause in (first, second):
+        for subclause in (clause.clauses if isinstance(clause, AllOf) else [clause]):
+            if subclause not in compiled:
+                compiled[subclause] = subclause.compile()
+            if compiled[subclause] | union == compiled[subclause]:
+                candidates.append(subclause)
+    if not candidates:
+        return None
+    candidate = AllOf(*candidates).simplify()
+    compiled[candidate] = candidate.compile()
+    if compiled[candidate] == union:
+        return candidate
+    return None
+
+
 class Matcher(Clause):
     __slots__ = []
 
@@ -888,9 +1536,15 @@ class Matcher(Clause):
 class Never(Matcher):
     __slots__ = []
 
+    def __reduce__(self):
+        return (self.__class__, ())
+
     def match(self, version):
         return False
 
+    def compile(self):
+        return IntervalSet()
+
     def __hash__(self):
         return hash((Never,))
 
@@ -910,9 +1564,15 @@ class Never(Matcher):
 class Always(Matcher):
     __slots__ = []
 
+    def __reduce__(self):
+        return (self.__class__, ())
+
     def match(self, version):
         return True
 
+    def compile(self):
+        return IntervalSet.everything()
+
     def __hash__(self):
         return hash((Always,))
 
@@ -949,7 +1609,7 @@ class Range(Matcher):
     # 1.2.3 matches only 1.2.3, not 1.2.3+4
     BUILD_STRICT = 'strict'
 
-    __slots__ = ['operator', 'target', 'prerelease_policy', 'build_policy']
+    __slots__ = ['operator', 'target', 'prerelease_policy', 'build_policy', '_target_key', '_target_prerelease']
 
     def __init__(self, operator, target, prerelease_policy=PRERELEASE_NATURAL, build_policy=BUILD_IMPLICIT):
         super(Range, self).__init__()
@@ -962,54 +1622,120 @@ class Range(Matcher):
         self.prerelease_policy = prerelease_policy
         self.build_policy = self.BUILD_STRICT if target.build else build_policy
 
-    def match(self, version):
-        if self.build_policy != self.BUILD_STRICT:
-            version = version.truncate('prerelease')
+        # Precomputed target-side values, for match().
+        self._target_key = target._cmp_key
+        self._target_prerelease = target.prerelease or ()
 
-        if version.prerelease:
-            same_patch = self.target.truncate() == version.truncate()
+    def __reduce__(self):
+        # Precomputed values are rebuilt on unpickling.
+        return (self.__class__, (self.operator, self.target, self.prerelease_policy, self.build_policy))
 
-            if self.prerelease_policy == self.PRERELEASE_SAMEPATCH and not same_patch:
-                return False
+    def __setstate__(self, state):
+        # Pickled by a previous release, without the precomputed values
+        state = _legacy_state(state)
+        self.__init__(state['operator'], state['target'], state['prerelease_policy'], state['build_policy'])
+
+    def match(self, version):
+        # Compare components directly instead of truncated copies of the
+        # version and target: this is called for every candidate version.
+        target = self.target
+        same_patch = (
+            version.patch == target.patch
+            and version.minor == target.minor
+            and version.major == target.major
+        )
+
+        if version.prerelease and self.prerelease_policy == self.PRERELEASE_SAMEPATCH and not same_patch:
+            return False
 
         if self.operator == self.OP_EQ:
-            if self.build_policy == self.BUILD_STRICT:
-                return (
-                    self.target.truncate('prerelease') == version.truncate('prerelease')
-                    and version.build == self.target.build
-                )
-            return version == self.target
+            return (
+                same_patch
+                and (version.prerelease or ()) == self._target_prerelease
+                and (self.build_policy != self.BUILD_STRICT or version.build == target.build)
+            )
         elif self.operator == self.OP_GT:
-            return version > self.target
+            return version._cmp_key > self._target_key
         elif self.operator == self.OP_GTE:
-            return version >= self.target
+            return version._cmp_key >= self._target_key
         elif self.operator == self.OP_LT:
             if (
                 version.prerelease
                 and self.prerelease_policy == self.PRERELEASE_NATURAL
-                and version.truncate() == self.target.truncate()
-                and not self.target.prerelease
+                and same_patch
+                and not target.prerelease
             ):
                 return False
-            return version < self.target
+            return version._cmp_key < self._target_key
         elif self.operator == self.OP_LTE:
-            return version <= self.target
+            return version._cmp_key <= self._target_key
         else:
             assert self.operator == self.OP_NEQ
             if self.build_policy == self.BUILD_STRICT:
                 return not (
-                    self.target.truncate('prerelease') == version.truncate('prerelease')
-                    and version.build == self.target.build
+                    same_patch
+                    and (version.prerelease or ()) == self._target_prerelease
+                    and version.build == target.build
                 )
 
             if (
                 version.prerelease
                 and self.prerelease_policy == self.PRERELEASE_NATURAL
-                and version.truncate() == self.target.truncate()
-                and not self.target.prerelease
+                and same_patch
+                and not target.prerelease
             ):
                 return False
-            return version != self.target
+            return not (same_patch and (version.prerelease or ()) == self._target_prerelease)
+
+    def compile(self):
+        target = self.target
+        key = self._target_key
+        # The lowest possible key for that release, below all its prereleases
+        lowest = (target.major, target.minor, target.patch, ())
+        release = (target.major, target.minor, target.patch, _RELEASE_KEY)
+        # Whether prereleases of the target release are excluded (see match())
+        natural_release = self.prerelease_policy == self.PRERELEASE_NATURAL and not target.prerelease
+
+        if self.operator == self.OP_EQ:
+            if self.build_policy == self.BUILD_STRICT:
+                builds = BuildSet([target.build])
+            else:
+                builds = ALL_BUILDS
+            intervals = [Interval(key, key, high_closed=True, builds=builds)]
+        elif self.operator == self.OP_GT:
+            intervals = [Interval(key, None, low_closed=False)]
+        elif self.operator == self.OP_GTE:
+            intervals = [Interval(key, None)]
+        elif self.operator == self.OP_LT:
+            intervals = [Interval(None, lowest if natural_release else key)]
+        elif self.operator == self.OP_LTE:
+            intervals = [Interval(None, key, high_closed=True)]
+        else:
+            assert self.operator == self.OP_NEQ
+            if self.build_policy == self.BUILD_STRICT:
+                intervals = [
+                    Interval(None, key),
+                    Interval(key, key, high_closed=True, builds=~BuildSet([target.build])),
+                    Interval(key, None, low_closed=False),
+                ]
+            elif natural_release:
+                intervals = [Interval(None, lowest), Interval(release, None, low_closed=False)]
+            else:
+                intervals = [Interval(None, key), Interval(key, None, low_closed=False)]
+
+        prereleases = intervals
+        if self.prerelease_policy == self.PRERELEASE_SAMEPATCH:
+            # Only prereleases of the target release may match.
+            prereleases = _combine_layers(intervals, [Interval(lowest, release)], BuildSet.__and__)
+        return IntervalSet(intervals, prereleases)
+
+    def simplify(self):
+        compiled = self.compile()
+        if compiled.is_empty():
+            return Never()
+        elif compiled == IntervalSet.everything():
+            return Always()
+        return self
 
     def __hash__(self):
         return hash((Range, self.operator, self.target, self.prerelease_policy))
@@ -1040,6 +1766,864 @@ class Range(Matcher):
         )
 
 
+# Compiled specs
+# ==============
+#
+# A spec is compiled into an IntervalSet: sorted, disjoint intervals of
+# precedence keys (Version._cmp_key), for releases and prereleases separately.
+# Bounds are either the key of an actual version, or the "lowest key" of a
+# release: (major, minor, patch, ()), lower than any of its prereleases.
+
+
+class BuildSet(object):
+    """A set of build metadata tuples.
+
+    Holds either the builds in ``values``, or all builds but those if
+    ``exclude`` is set.
+    """
+    __slots__ = ['values', 'exclude']
+
+    def __init__(self, values=(), exclude=False):
+        self.values = frozenset(values)
+        self.exclude = exclude
+
+    def is_all(self):
+        return self.exclude and not self.values
+
+    def is_empty(self):
+        return not self.exclude and not self.values
+
+    def __contains__(self, build):
+        return (build in self.values) != self.exclude
+
+    def __and__(self, other):
+        if self.exclude and other.exclude:
+            return BuildSet(self.values | other.values, exclude=True)
+        elif self.exclude:
+            return BuildSet(other.values - self.values)
+        elif other.exclude:
+            return BuildSet(self.values - other.values)
+        return BuildSet(self.values & other.values)
+
+    def __or__(self, other):
+        if self.exclude and other.exclude:
+            return BuildSet(self.values & other.values, exclude=True)
+        elif self.exclude:
+            return BuildSet(self.values - other.values, exclude=True)
+        elif other.exclude:
+            return BuildSet(other.values - self.values, exclude=True)
+        return BuildSet(self.values | other.values)
+
+    def __invert__(self):
+        return BuildSet(self.values, exclude=not self.exclude)
+
+    def __eq__(self, other):
+        if not isinstance(other, BuildSet):
+            return NotImplemented
+        return self.values == other.values and self.exclude == other.exclude
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((BuildSet, self.values, self.exclude))
+
+    def __repr__(self):
+        return 'BuildSet(%r%s)' % (
+            sorted('.'.join(build) for build in self.values),
+            ', exclude=True' if self.exclude else '',
+        )
+
+
+ALL_BUILDS = BuildSet(exclude=True)
+NO_BUILDS = BuildSet()
+
+
+def _format_key(key):
+    """Render a precedence key as a version string.
+
+    The lowest key of a release is rendered with a trailing '-'.
+    """
+    major, minor, patch, prerelease_key = key
+    text = '%d.%d.%d' % (major, minor, patch)
+    if prerelease_key == _RELEASE_KEY:
+        return text
+    return '%s-%s' % (text, '.'.join(
+        str(part.value) if isinstance(part, NumericIdentifier) else part.value.decode('ascii')
+        for part in prerelease_key
+    ))
+
+
+def _is_release_key(key):
+    return key[3] == _RELEASE_KEY
+
+
+def _next_patch_key(key, prerelease_key=_RELEASE_KEY):
+    return (key[0], key[1], key[2] + 1, prerelease_key)
+
+
+class Interval(object):
+    """A range of precedence keys, matching versions whose build is in ``builds``.
+
+    A bound of ``None`` is unbounded; only single-key intervals restrict builds.
+    """
+    __slots__ = ['low', 'high', 'low_closed', 'high_closed', 'builds']
+
+    def __init__(self, low=None, high=None, low_closed=True, high_closed=False, builds=ALL_BUILDS):
+        self.low = low
+        self.high = high
+        self.low_closed = low_closed and low is not None
+        self.high_closed = high_closed and high is not None
+        self.builds = builds
+
+    def contains(self, key):
+        """Whether a precedence key lies between the bounds of the interval."""
+        low = self.low
+        if low is not None and (key < low or (not self.low_closed and key == low)):
+            return False
+        high = self.high
+        if high is not None and (key > high or (not self.high_closed and key == high)):
+            return False
+        return True
+
+    def is_empty(self):
+        if self.builds.is_empty():
+            return True
+        elif self.low is None or self.high is None:
+            return False
+        elif self.low == self.high:
+            return not (self.low_closed and self.high_closed)
+        return self.low > self.high
+
+    def __eq__(self, other):
+        if not isinstance(other, Interval):
+            return NotImplemented
+        return (
+            self.low == other.low
+            and self.high == other.high
+            and self.low_closed == other.low_closed
+            and self.high_closed == other.high_closed
+            and self.builds == other.builds
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((Interval, self.low, self.high, self.low_closed, self.high_closed, self.builds))
+
+    def __repr__(self):
+        return '<Interval: %s%s, %s%s%s>' % (
+            '[' if self.low_closed else '(',
+            '*' if self.low is None else _format_key(self.low),
+            '*' if self.high is None else _format_key(self.high),
+            ']' if self.high_closed else ')',
+            '' if self.builds.is_all() else ' %r' % self.builds,
+        )
+
+
+# Lowest keys of releases and prereleases, for canonical unbounded intervals
+_MIN_RELEASE_KEY = (0, 0, 0, _RELEASE_KEY)
+_MIN_PRERELEASE_KEY = (0, 0, 0, ())
+_LOWEST_PRERELEASE_KEY = (NumericIdentifier(0),)
+
+
+def _canonical_release_interval(interval):
+    """Align the bounds of an interval of releases on release keys.
+
+    Returns None if the interval contains no release.
+    """
+    if not interval.builds.is_all():
+        # A single key, with restricted builds.
+        return interval if _is_release_key(interval.low) else None
+
+    low, high = interval.low, interval.high
+    if low is not None:
+        if not _is_release_key(low):
+            # The lowest release above a prerelease is that release.
+            low = (low[0], low[1], low[2], _RELEASE_KEY)
+        elif not interval.low_closed:
+            low = _next_patch_key(low)
+    if high is not None:
+        if not _is_release_key(high):
+            high = (high[0], high[1], high[2], _RELEASE_KEY)
+        elif interval.high_closed:
+            high = _next_patch_key(high)
+    # All bounds are now of the [low, high) form.
+    if low == _MIN_RELEASE_KEY:
+        low = None
+    if high is not None and (high <= _MIN_RELEASE_KEY or (low is not None and low >= high)):
+        return None
+    return Interval(low, high)
+
+
+def _canonical_prerelease_interval(interval):
+    """Align the bounds of an interval of prereleases on prerelease keys.
+
+    Returns None if the interval contains no prerelease.
+    """
+    if not interval.builds.is_all():
+        return None if _is_release_key(interval.low) else interval
+
+    low, low_closed = interval.low, interval.low_closed
+    high, high_closed = interval.high, interval.high_closed
+    if low is not None:
+        if _is_release_key(low):
+            # No prerelease lies between a release and the next patch.
+            low, low_closed = _next_patch_key(low, ()), True
+        elif low[3] == ():
+            low_closed = True
+    if high is not None:
+        if _is_release_key(high):
+            high, high_closed = _next_patch_key(high, ()), False
+        elif high[3] == ():
+            high_closed = False
+
+    # X.Y.Z-0 is the lowest prerelease of X.Y.Z, and 0.0.0-0 the lowest of all.
+    if low is not None and low_closed and low[3] == _LOWEST_PRERELEASE_KEY:
+        low = (low[0], low[1], low[2], ())
+    if high is not None and not high_closed and high[3] == _LOWEST_PRERELEASE_KEY:
+        high = (high[0], high[1], high[2], ())
+    if low == _MIN_PRERELEASE_KEY:
+        low = None
+    if high == _MIN_PRERELEASE_KEY and not high_closed:
+        return None
+    result = Interval(low, high, low_closed, high_closed)
+    return None if result.is_empty() else result
+
+
+def _layer_points(*layers):
+    """Sorted, unique bounds of all intervals in some layers."""
+    keys = sorted(
+        bound
+        for layer in layers
+        for interval in layer
+        for bound in (interval.low, interval.high)
+        if bound is not None
+    )
+    points = []
+    for key in keys:
+        if not points or points[-1] != key:
+            points.append(key)
+    return points
+
+
+def _interval_atoms(interval, points):
+    """The first and last atoms covered by an interval; see _layer_atoms."""
+    if interval.low is None:
+        start = 0
+    else:
+        index = bisect.bisect_left(points, interval.low)
+        start = 2 * index + 1 if interval.low_closed else 2 * index + 2
+    if interval.high is None:
+        end = 2 * len(points)
+    else:
+        index = bisect.bisect_left(points, interval.high)
+        end = 2 * index + 1 if interval.high_closed else 2 * index
+    return start, end
+
+
+def _layer_atoms(layer, points):
+    """Split a layer of disjoint intervals along points.
+
+    Atom 2*i+1 is the points[i] key, and atom 2*i the keys between points[i-1]
+    and points[i]; each atom maps to the BuildSet matched on those keys.
+    """
+    atoms = [NO_BUILDS] * (2 * len(points) + 1)
+    for interval in layer:
+        start, end = _interval_atoms(interval, points)
+        for atom in range(start, end + 1):
+            atoms[atom] = interval.builds
+    return atoms
+
+
+def _layer_from_atoms(atoms, points):
+    """Rebuild a list of disjoint intervals from atoms; see _layer_atoms."""
+
+    def make_interval(start, end):
+        if start == 0:
+            low, low_closed = None, False
+        elif start % 2:
+            low, low_closed = points[start // 2], True
+        else:
+            low, low_closed = points[start // 2 - 1], False
+        if end == len(atoms) - 1:
+            high, high_closed = None, False
+        elif end % 2:
+            high, high_closed = points[end // 2], True
+        else:
+            high, high_closed = points[end // 2], False
+        return Interval(low, high, low_closed, high_closed)
+
+    layer = []
+    start = None
+    for atom, builds in enumerate(atoms):
+        if builds.is_all():
+            if start is None:
+                start = atom
+            continue
+        if start is not None:
+            layer.append(make_interval(start, atom - 1))
+            start = None
+        if not builds.is_empty():
+            # Only single keys may restrict builds.
+            key = points[atom // 2]
+            layer.append(Interval(key, key, True, True, builds))
+    if start is not None:
+        layer.append(make_interval(start, len(atoms) - 1))
+    return layer
+
+
+def _combine_layers(first, second, combine):
+    points = _layer_points(first, second)
+    return _layer_from_atoms(
+        [combine(a, b) for a, b in zip(_layer_atoms(first, points), _layer_atoms(second, points))],
+        points,
+    )
+
+
+def _normalize_layer(layer, canonicalize):
+    intervals = []
+    for interval in layer:
+        interval = canonicalize(interval)
+        if interval is not None:
+            intervals.append(interval)
+    # Sort and merge overlapping or adjacent intervals.
+    points = _layer_points(intervals)
+    atoms = [NO_BUILDS] * (2 * len(points) + 1)
+    for interval in intervals:
+        start, end = _interval_atoms(interval, points)
+        for atom in range(start, end + 1):
+            atoms[atom] = atoms[atom] | interval.builds
+    return tuple(_layer_from_atoms(atoms, points))
+
+
+# Lower than any precedence key
+_MIN_KEY = ()
+
+
+def _sortable_key_prefix(key):
+    """The bytes starting the to_sortable_bytes() of versions with a given precedence key.
+
+    The lowest key of a release maps to the bytes of its major, minor and patch.
+    """
+    major, minor, patch, prerelease_key = key
+    parts = [_encode_number(major), _encode_number(minor), _encode_number(patch)]
+    if prerelease_key == _RELEASE_KEY:
+        parts.append(_SORTABLE_RELEASE)
+    elif prerelease_key:
+        for part in prerelease_key:
+            if isinstance(part, NumericIdentifier):
+                parts.append(_SORTABLE_NUMERIC + _encode_number(part.value))
+            else:
+                parts.append(_SORTABLE_ALPHA + part.value + _SORTABLE_END)
+        parts.append(_SORTABLE_END)
+    return b''.join(parts)
+
+
+def _sortable_bound(key, after):
+    """The lowest sortable bytes above (or equal to, unless ``after``) those of versions with a key."""
+    prefix = _sortable_key_prefix(key)
+    if after and key[3]:
+        # No version has a lowest key: only skip a real key's builds.
+        return prefix + _SORTABLE_BUILD_MAX
+    return prefix
+
+
+def _interval_byte_ranges(interval):
+    """Yield the (start, stop) ranges of sortable bytes of an interval."""
+    start = b'' if interval.low is None else _sortable_bound(interval.low, after=not interval.low_closed)
+    stop = None if interval.high is None else _sortable_bound(interval.high, after=interval.high_closed)
+    builds = interval.builds
+    if builds.is_all():
+        yield (start, stop)
+        return
+
+    # A single key, with restricted builds.
+    points = sorted(start + _encode_identifiers(build) for build in builds.values)
+    if not builds.exclude:
+        for point in points:
+            yield (point, point + _SORTABLE_END)
+        return
+    for point in points:
+        yield (start, point)
+        start = point + _SORTABLE_END
+    yield (start, stop)
+
+
+class IntervalSet(object):
+    """A set of versions, as sorted, disjoint intervals of precedence keys.
+
+    Releases and prereleases are stored in separate layers, as their matching
+    rules differ: ``>=1.0.0,<2.0.0`` excludes ``2.0.0-rc1`` with most syntaxes.
+    """
+    __slots__ = ['releases', 'prereleases', '_release_lows', '_prerelease_lows']
+
+    def __init__(self, releases=(), prereleases=()):
+        self.releases = _normalize_layer(releases, _canonical_release_interval)
+        self.prereleases = _normalize_layer(prereleases, _canonical_prerelease_interval)
+        self._release_lows = self._lows(self.releases)
+        self._prerelease_lows = self._lows(self.prereleases)
+
+    @classmethod
+    def everything(cls):
+        return cls([Interval()], [Interval()])
+
+    @staticmethod
+    def _lows(layer):
+        return [_MIN_KEY if interval.low is None else interval.low for interval in layer]
+
+    def match(self, version):
+        """Check whether a (non-partial) Version belongs to the set."""
+        if version.prerelease:
+            layer, lows = self.prereleases, self._prerelease_lows
+        else:
+            layer, lows = self.releases, self._release_lows
+
+        key = version._cmp_key
+        index = bisect.bisect_right(lows, key) - 1
+        if index < 0:
+            return False
+        interval = layer[index]
+        if index and not interval.low_closed and interval.low == key:
+            # The previous interval may end on that key.
+            interval = layer[index - 1]
+        return interval.contains(key) and version.build in interval.builds
+
+    def is_empty(self):
+        return not (self.releases or self.prereleases)
+
+    def is_subset(self, other):
+        """Whether all versions of the set belong to another IntervalSet."""
+        return self & other == self
+
+    def byte_ranges(self, releases=True, prereleases=True):
+        """Return sorted (start, stop) ranges of Version.to_sortable_bytes() covering the set.
+
+        A ``stop`` of None is unbounded. The ranges include every version of
+        the set, but may also include prereleases lying between matching
+        releases, or releases between matching prereleases.
+
+        With releases=False or prereleases=False, only cover the versions
+        of the other layer.
+        """
+        layers = [layer for layer, enabled in [(self.releases, releases), (self.prereleases, prereleases)] if enabled]
+        ranges = sorted(
+            (
+                (start, stop)
+                for layer in layers
+                for interval in layer
+                for start, stop in _interval_byte_ranges(interval)
+                if stop is None or start < stop
+            ),
+            key=lambda byte_range: byte_range[0],
+        )
+        merged = []
+        for start, stop in ranges:
+            if not merged or (merged[-1][1] is not None and start > merged[-1][1]):
+                merged.append((start, stop))
+                continue
+            # Overlapping ranges
+            previous_start, previous_stop = merged[-1]
+            if previous_stop is not None and (stop is None or stop > previous_stop):
+                merged[-1] = (previous_start, stop)
+        return merged
+
+    def __and__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return IntervalSet(
+            _combine_layers(self.releases, other.releases, BuildSet.__and__),
+            _combine_layers(self.prereleases, other.prereleases, BuildSet.__and__),
+        )
+
+    def __or__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return IntervalSet(
+            _combine_layers(self.releases, other.releases, BuildSet.__or__),
+            _combine_layers(self.prereleases, other.prereleases, BuildSet.__or__),
+        )
+
+    def __invert__(self):
+        return IntervalSet(
+            _combine_layers(self.releases, (), lambda builds, _none: ~builds),
+            _combine_layers(self.prereleases, (), lambda builds, _none: ~builds),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.releases == other.releases and self.prereleases == other.prereleases
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((IntervalSet, self.releases, self.prereleases))
+
+    def __repr__(self):
+        return '<IntervalSet: releases=%r, prereleases=%r>' % (list(self.releases), list(self.prereleases))
+
+
+def _pack_release_key(key):
+    """The Version.packed_key of a release precedence key, or None if it can't be packed."""
+    major, minor, patch, _prerelease_key = key
+    if minor >> 64 or patch >> 64:
+        return None
+    return (major << 129) | (minor << 65) | (patch << 1) | 1
+
+
+class _MatcherSource(object):
+    """Python source of a function matching versions against an IntervalSet.
+
+    Each layer becomes a tree of if/else on the bounds of its intervals,
+    ending in comparisons of the version key to constants: bounds and build
+    sets are named K<n> and B<n> in ``namespace``.
+    """
+
+    # Intervals tested in sequence, below which the tree stops splitting
+    LEAF_SIZE = 4
+
+    def __init__(self):
+        self.lines = []
+        self.namespace = {}
+        self.constants = 0
+
+    def constant(self, prefix, value):
+        name = '%s%d' % (prefix, self.constants)
+        self.constants += 1
+        self.namespace[name] = value
+        return name
+
+    def condition(self, interval, convert):
+        if interval.low is not None and interval.low == interval.high:
+            # A single key
+            condition = 'key == %s' % self.constant('K', convert(interval.low))
+            if interval.builds.is_all():
+                return condition
+            return '(%s and version.build in %s)' % (condition, self.constant('B', interval.builds))
+
+        parts = []
+        if interval.low is not None:
+            parts.append('%s %s' % (self.constant('K', convert(interval.low)), '<=' if interval.low_closed else '<'))
+        parts.append('key')
+        if interval.high is not None:
+            parts.append('%s %s' % ('<=' if interval.high_closed else '<', self.constant('K', convert(interval.high))))
+        if len(parts) == 1:
+            return 'True'
+        # Only single keys may restrict builds.
+        return ' '.join(parts)
+
+    def add_layer(self, intervals, convert, indent):
+        """Add the statements returning whether ``key`` lies within sorted, disjoint intervals."""
+        if len(intervals) <= self.LEAF_SIZE:
+            conditions = [self.condition(interval, convert) for interval in intervals]
+            self.lines.append('%sreturn %s' % (indent, ' or '.join(conditions) or 'False'))
+            return
+
+        middle = len(intervals) // 2
+        pivot = intervals[middle]
+        # Keys below the pivot's low bound can only belong to earlier intervals.
+        self.lines.append('%sif key %s %s:' % (
+            indent, '<' if pivot.low_closed else '<=', self.constant('K', convert(pivot.low)),
+        ))
+        self.add_layer(intervals[:middle], convert, indent + '    ')
+        self.add_layer(intervals[middle:], convert, indent)
+
+
+def _generate_matcher(compiled, fallback):
+    """Generate a function matching versions against an IntervalSet.
+
+    Partial versions are passed to ``fallback``.
+    """
+    source = _MatcherSource()
+    source.namespace.update(fallback=fallback, match_compiled=compiled.match)
+    source.lines.extend([
+        'def match(version):',
+        '    if version.partial:',
+        '        return fallback(version)',
+        '    if version.prerelease:',
+        '        key = version._cmp_key',
+    ])
+    source.add_layer(compiled.prereleases, lambda key: key, '        ')
+
+    release_bounds = [
+        bound for interval in compiled.releases for bound in (interval.low, interval.high) if bound is not None
+    ]
+    if all(_pack_release_key(bound) is not None for bound in release_bounds):
+        # Compare releases through their packed keys, when both sides can be packed.
+        source.lines.extend([
+            '    key = version._packed_key',
+            '    if key is False:',
+            '        return match_compiled(version)',
+        ])
+        source.add_layer(compiled.releases, _pack_release_key, '    ')
+    else:
+        source.lines.append('    key = version._cmp_key')
+        source.add_layer(compiled.releases, lambda key: key, '    ')
+
+    exec(compile('\n'.join(source.lines), '<semantic_version matcher>', 'exec'), source.namespace)
+    return source.namespace['match']
+
+
+def _as_interval_set(value):
+    """Compile a spec, unless already an IntervalSet."""
+    if isinstance(value, IntervalSet):
+        return value
+    return value.compile()
+
+
+class VersionIndex(object):
+    """An immutable, sorted collection of versions.
+
+    Looking up versions matching a compiled spec only visits the versions
+    within its intervals, through a binary search.
+    """
+
+    def __init__(self, versions=()):
+        self._versions = sorted(versions, key=lambda v: v.precedence_key)
+        # For each layer, positions in self._versions and matching precedence keys
+        self._releases = ([], [])
+        self._prereleases = ([], [])
+        for position, version in enumerate(self._versions):
+            if version.partial:
+                raise ValueError("Cannot index partial version %r" % version)
+            positions, keys = self._prereleases if version.prerelease else self._releases
+            positions.append(position)
+            keys.append(version._cmp_key)
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __iter__(self):
+        return iter(self._versions)
+
+    def __repr__(self):
+        return '<VersionIndex: %d versions>' % len(self._versions)
+
+    @staticmethod
+    def _slice(keys, interval):
+        """Return the (start, stop) indices of keys within an interval."""
+        if interval.low is None:
+            start = 0
+        elif interval.low_closed:
+            start = bisect.bisect_left(keys, interval.low)
+        else:
+            start = bisect.bisect_right(keys, interval.low)
+        if interval.high is None:
+            stop = len(keys)
+        elif interval.high_closed:
+            stop = bisect.bisect_right(keys, interval.high)
+        else:
+            stop = bisect.bisect_left(keys, interval.high)
+        return start, stop
+
+    def _matching_positions(self, layer, intervals):
+        positions, keys = layer
+        for interval in intervals:
+            start, stop = self._slice(keys, interval)
+            for index in range(start, stop):
+                position = positions[index]
+                if interval.builds.is_all() or self._versions[position].build in interval.builds:
+                    yield position
+
+    def _highest_position(self, layer, intervals):
+        positions, keys = layer
+        for interval in reversed(intervals):
+            start, stop = self._slice(keys, interval)
+            best = None
+            for index in range(stop - 1, start - 1, -1):
+                if best is not None and keys[index] != keys[best]:
+                    break
+                if interval.builds.is_all() or self._versions[positions[index]].build in interval.builds:
+                    # Like max(), return the first of versions differing only by their build.
+                    best = index
+            if best is not None:
+                return positions[best]
+        return -1
+
+    def _positions(self, intervals):
+        """Yield the positions of the versions within an IntervalSet, in ascending order."""
+        return heapq.merge(
+            self._matching_positions(self._releases, intervals.releases),
+            self._matching_positions(self._prereleases, intervals.prereleases),
+        )
+
+    def filter(self, intervals):
+        """Yield the versions within an IntervalSet, in ascending order."""
+        for position in self._positions(intervals):
+            yield self._versions[position]
+
+    def select(self, intervals):
+        """Return the highest version within an IntervalSet, or None."""
+        position = max(
+            self._highest_position(self._releases, intervals.releases),
+            self._highest_position(self._prereleases, intervals.prereleases),
+        )
+        if position < 0:
+            return None
+        return self._versions[position]
+
+
+def match_matrix(specs, versions):
+    """Return, for each spec, the sorted indices of the versions it matches.
+
+    Versions are sorted once; each compiled spec then finds its matching
+    versions through a binary search, instead of matching every pair.
+    """
+    versions = list(versions)
+    for version in versions:
+        if version.partial:
+            raise ValueError("Cannot match partial version %r" % version)
+    # Positions in the index, to indices in versions
+    order = sorted(range(len(versions)), key=lambda i: versions[i].precedence_key)
+    index = VersionIndex(versions[i] for i in order)
+
+    rows = []
+    for spec in specs:
+        compiled = spec._get_compiled()
+        if compiled is None:
+            rows.append([i for i, version in enumerate(versions) if spec.match(version)])
+        else:
+            rows.append(sorted(order[position] for position in index._positions(compiled)))
+    return rows
+
+
+class _StabbingTree(object):
+    """A segment tree over the intervals of one layer of many IntervalSets.
+
+    The sorted bounds of all intervals split precedence keys into "atoms":
+    atom 2*i+1 is the i-th bound itself, and atom 2*i the keys between bounds
+    i-1 and i. Each interval covers a range of atoms, and is stored in the
+    O(log n) tree nodes covering that range; the intervals containing a key
+    are those stored on the path from its atom to the root.
+    """
+    __slots__ = ['bounds', 'size', 'nodes']
+
+    def __init__(self, entries):
+        """Build from a list of (interval, value) pairs."""
+        self.bounds = sorted(set(
+            bound
+            for interval, _value in entries
+            for bound in (interval.low, interval.high)
+            if bound is not None
+        ))
+        self.size = 2 * len(self.bounds) + 1
+        self.nodes = [[] for _i in range(2 * self.size)]
+        for interval, value in entries:
+            start, stop = self._atoms(interval)
+            builds = None if interval.builds.is_all() else interval.builds
+            start += self.size
+            stop += self.size
+            while start < stop:
+                if start & 1:
+                    self.nodes[start].append((value, builds))
+                    start += 1
+                if stop & 1:
+                    stop -= 1
+                    self.nodes[stop].append((value, builds))
+                start >>= 1
+                stop >>= 1
+
+    def _atom(self, key):
+        index = bisect.bisect_left(self.bounds, key)
+        if index < len(self.bounds) and self.bounds[index] == key:
+            return 2 * index + 1
+        return 2 * index
+
+    def _atoms(self, interval):
+        """Return the (start, stop) range of atoms within an interval."""
+        if interval.low is None:
+            start = 0
+        else:
+            start = self._atom(interval.low) + (0 if interval.low_closed else 1)
+        if interval.high is None:
+            stop = self.size
+        else:
+            stop = self._atom(interval.high) + (1 if interval.high_closed else 0)
+        return start, stop
+
+    def stab(self, version):
+        """Yield the values of the intervals containing a version."""
+        node = self._atom(version._cmp_key) + self.size
+        build = version.build
+        nodes = self.nodes
+        while node:
+            for value, builds in nodes[node]:
+                if builds is None or build in builds:
+                    yield value
+            node >>= 1
+
+
+class SpecSet(object):
+    """An immutable collection of specs, keyed by caller-provided ids.
+
+    Finding the specs matching a version walks a segment tree of their
+    compiled intervals, instead of matching each spec.
+    """
+
+    def __init__(self, specs=()):
+        if hasattr(specs, 'items'):
+            specs = specs.items()
+        self._specs = collections.OrderedDict(specs)
+        self._keys = list(self._specs.keys())
+        self._values = list(self._specs.values())
+
+        # Entries refer to specs by their position, to sort matches.
+        releases = []
+        prereleases = []
+        # Specs with custom clauses, which can't be compiled
+        self._uncompiled = []
+        for position, spec in enumerate(self._values):
+            compiled = spec._get_compiled()
+            if compiled is None:
+                self._uncompiled.append(position)
+                continue
+            releases.extend((interval, position) for interval in compiled.releases)
+            prereleases.extend((interval, position) for interval in compiled.prereleases)
+        self._releases = _StabbingTree(releases)
+        self._prereleases = _StabbingTree(prereleases)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __getitem__(self, key):
+        return self._specs[key]
+
+    def __repr__(self):
+        return '<SpecSet: %d specs>' % len(self._keys)
+
+    def match(self, version):
+        """Return the keys of the specs matching a Version, in insertion order."""
+        if version.partial:
+            raise ValueError("Cannot match partial version %r" % version)
+
+        tree = self._prereleases if version.prerelease else self._releases
+        positions = list(tree.stab(version))
+        positions.extend(
+            position for position in self._uncompiled
+            if self._values[position].clause.match(version)
+        )
+        positions.sort()
+        return [self._keys[position] for position in positions]
+
+
+def _spec_target(major, minor, patch, prerelease, build):
+    """Build the target Version of a spec block, from its regexp groups.
+
+    The numbers come from int(); only the identifiers need validating.
+    """
+    prerelease = tuple(prerelease.split('.')) if prerelease else ()
+    build = tuple(build.split('.')) if build else ()
+    Version._validate_identifiers(prerelease, allow_leading_zeroes=False)
+    Version._validate_identifiers(build, allow_leading_zeroes=True)
+    return Version._from_parts(major, minor, patch, prerelease, build)
+
+
 @BaseSpec.register_syntax
 class SimpleSpec(BaseSpec):
 
@@ -1101,21 +2685,15 @@ class SimpleSpec(BaseSpec):
             patch = None if patch_t in cls.EMPTY_VALUES else int(patch_t)
 
             if major is None:  # '*'
-                target = Version(major=0, minor=0, patch=0)
+                target = Version._from_parts(0, 0, 0, (), ())
                 if prefix not in (cls.PREFIX_EQ, cls.PREFIX_GTE):
                     raise ValueError("Invalid simple spec: %r" % expr)
             elif minor is None:
-                target = Version(major=major, minor=0, patch=0)
+                target = Version._from_parts(major, 0, 0, (), ())
             elif patch is None:
-                target = Version(major=major, minor=minor, patch=0)
+                target = Version._from_parts(major, minor, 0, (), ())
             else:
-                target = Version(
-                    major=major,
-                    minor=minor,
-                    patch=patch,
-                    prerelease=prerel.split('.') if prerel else (),
-                    build=build.split('.') if build else (),
-                )
+                target = _spec_target(major, minor, patch, prerel, build)
 
             if (major is None or minor is None or patch is None) and (prerel or build):
                 raise ValueError("Invalid simple spec: %r" % expr)
@@ -1309,22 +2887,15 @@ class NpmSpec(BaseSpec):
                         if clause.operator in (Range.OP_GT, Range.OP_GTE):
                             prerelease_clauses.append(Range(
                                 operator=Range.OP_LT,
-                                target=Version(
-                                    major=clause.target.major,
-                                    minor=clause.target.minor,
-                                    patch=clause.target.patch + 1,
+                                target=Version._from_parts(
+                                    clause.target.major, clause.target.minor, clause.target.patch + 1, (), (),
                                 ),
                                 prerelease_policy=Range.PRERELEASE_ALWAYS,
                             ))
                         elif clause.operator in (Range.OP_LT, Range.OP_LTE):
                             prerelease_clauses.append(Range(
                                 operator=Range.OP_GTE,
-                                target=Version(
-                                    major=clause.target.major,
-                                    minor=clause.target.minor,
-                                    patch=0,
-                                    prerelease=(),
-                                ),
+                                target=Version._from_parts(clause.target.major, clause.target.minor, 0, (), ()),
                                 prerelease_policy=Range.PRERELEASE_ALWAYS,
                             ))
                         prerelease_clauses.append(clause)
@@ -1378,22 +2949,16 @@ class NpmSpec(BaseSpec):
                 build = None
 
             if major is None:  # '*', 'x', 'X'
-                target = Version(major=0, minor=0, patch=0)
+                target = Version._from_parts(0, 0, 0, (), ())
                 if prefix not in [cls.PREFIX_EQ, cls.PREFIX_GTE]:
                     raise ValueError("Invalid expression %r" % simple)
                 prefix = cls.PREFIX_GTE
             elif minor is None:
-                target = Version(major=major, minor=0, patch=0)
+                target = Version._from_parts(major, 0, 0, (), ())
             elif patch is None:
-                target = Version(major=major, minor=minor, patch=0)
+                target = Version._from_parts(major, minor, 0, (), ())
             else:
-                target = Version(
-                    major=major,
-                    minor=minor,
-                    patch=patch,
-                    prerelease=prerel.split('.') if prerel else (),
-                    build=build.split('.') if build else (),
-                )
+                target = _spec_target(major, minor, patch, prerel, build)
 
             if (major is None or minor is None or patch is None) and (prerel or build):
                 raise ValueError("Invalid NPM spec: %r" % simple)
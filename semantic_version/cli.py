@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Command-line tools for streams of versions, run with ``python -m semantic_version``."""
+
+import argparse
+import binascii
+import heapq
+import io
+import sys
+import tempfile
+import timeit
+
+from . import base
+
+
+# Lines sorted in memory before spilling a sorted run to a temporary file.
+DEFAULT_BUFFER_SIZE = 100000
+
+# Maximum number of runs merged at once, bounding open temporary files.
+MERGE_FAN_IN = 64
+
+# Sort keys are the hexadecimal to_sortable_bytes(); descending keys swap each digit.
+_HEX_DIGITS = '0123456789abcdef'
+_REVERSED_HEX = dict((ord(digit), reversed_digit) for digit, reversed_digit in zip(_HEX_DIGITS, _HEX_DIGITS[::-1]))
+
+
+class InputError(ValueError):
+    """An input line is not a valid version."""
+
+
+class _Reader(object):
+    """Iterate over the (location, text) of non-blank lines of several files.
+
+    ``location`` is ``name:lineno``; '-' reads from stdin.
+    """
+
+    def __init__(self, paths, stdin):
+        self.paths = paths or ['-']
+        self.stdin = stdin
+        self.count = 0
+
+    def __iter__(self):
+        for path in self.paths:
+            if path == '-':
+                for item in self._read('<stdin>', self.stdin):
+                    yield item
+            else:
+                with io.open(path, encoding='utf-8') as f:
+                    for item in self._read(path, f):
+                        yield item
+
+    def _read(self, name, lines):
+        for lineno, line in enumerate(lines, 1):
+            text = line.strip()
+            if text:
+                self.count += 1
+                yield '%s:%d' % (name, lineno), text
+
+
+def _versions(reader, build, skip_invalid, stderr):
+    """Yield the (version, text) of each line, converted with build()."""
+    for location, text in reader:
+        try:
+            version = build(text)
+        except ValueError as e:
+            if not skip_invalid:
+                raise InputError("%s: %s" % (location, e))
+            stderr.write("%s: skipped: %s\n" % (location, e))
+            continue
+        yield version, text
+
+
+def _sort_key(version, reverse):
+    key = binascii.hexlify(version.to_sortable_bytes()).decode('ascii')
+    if reverse:
+        # A key must still sort after the keys it is a prefix of.
+        return key.translate(_REVERSED_HEX) + '~'
+    return key
+
+
+def _write_run(lines):
+    """Store sorted 'key\\ttext\\n' lines in a temporary file, and rewind it."""
+    run = tempfile.TemporaryFile(mode='w+')
+    run.writelines(lines)
+    run.seek(0)
+    return run
+
+
+def _merge(runs):
+    """Merge sorted run files, a few at a time; yields 'key\\ttext\\n' lines."""
+    while len(runs) > MERGE_FAN_IN:
+        merged = []
+        for start in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[start:start + MERGE_FAN_IN]
+            merged.append(_write_run(heapq.merge(*group)))
+            for run in group:
+                run.close()
+        runs = merged
+
+    try:
+        for line in heapq.merge(*runs):
+            yield line
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _sorted_lines(items, reverse, buffer_size):
+    """Sort the text of (version, text) items, in runs of at most buffer_size lines."""
+    runs = []
+    chunk = []
+    for version, text in items:
+        chunk.append((_sort_key(version, reverse), text))
+        if len(chunk) >= buffer_size:
+            chunk.sort()
+            runs.append(_write_run('%s\t%s\n' % item for item in chunk))
+            chunk = []
+    chunk.sort()
+
+    if not runs:
+        for _key, text in chunk:
+            yield text
+        return
+
+    if chunk:
+        runs.append(_write_run('%s\t%s\n' % item for item in chunk))
+    for line in _merge(runs):
+        yield line[line.index('\t') + 1:-1]
+
+
+def cmd_sort(args, reader, stdout, stderr):
+    items = _versions(reader, base.Version, args.skip_invalid, stderr)
+    for text in _sorted_lines(items, args.reverse, args.buffer_size):
+        stdout.write(text + '\n')
+    return 0
+
+
+def cmd_filter(args, reader, stdout, stderr):
+    match = base.BaseSpec.parse(args.spec, syntax=args.syntax).matcher()
+    for version, text in _versions(reader, base.Version, args.skip_invalid, stderr):
+        if match(version):
+            stdout.write(text + '\n')
+    return 0
+
+
+def cmd_select(args, reader, stdout, stderr):
+    match = base.BaseSpec.parse(args.spec, syntax=args.syntax).matcher()
+    best = None
+    for version, _text in _versions(reader, base.Version, args.skip_invalid, stderr):
+        if match(version) and (best is None or best < version):
+            best = version
+    if best is None:
+        return 1
+    stdout.write('%s\n' % best)
+    return 0
+
+
+def cmd_validate(args, reader, stdout, stderr):
+    status = 0
+    for location, text in reader:
+        if not base.validate(text):
+            stdout.write('%s: %s\n' % (location, text))
+            status = 1
+    return status
+
+
+def cmd_coerce(args, reader, stdout, stderr):
+    for version, _text in _versions(reader, base.Version.coerce, args.skip_invalid, stderr):
+        stdout.write('%s\n' % version)
+    return 0
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m semantic_version',
+        description="Sort, filter and validate line-delimited streams of versions.",
+    )
+    parser.add_argument('--stats', action='store_true', help="Report the throughput on stderr")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    def add_command(name, func, help_text, with_spec=False):
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        command.set_defaults(func=func)
+        if with_spec:
+            command.add_argument('spec', metavar='SPEC', help="The requirement specification")
+            command.add_argument(
+                '--syntax', choices=sorted(base.BaseSpec.SYNTAXES), default=base.DEFAULT_SYNTAX,
+                help="The syntax of SPEC (default: %(default)s)",
+            )
+        if func is not cmd_validate:
+            command.add_argument(
+                '--skip-invalid', action='store_true',
+                help="Report invalid lines on stderr and skip them, instead of failing",
+            )
+        command.add_argument('files', metavar='FILE', nargs='*', help="Input files, one version per line; - for stdin")
+        return command
+
+    sort = add_command('sort', cmd_sort, "Print versions in ascending precedence order.")
+    sort.add_argument('-r', '--reverse', action='store_true', help="Sort in descending order")
+    sort.add_argument(
+        '--buffer-size', type=int, default=DEFAULT_BUFFER_SIZE,
+        help="Lines sorted in memory; larger inputs are merged from temporary files (default: %(default)s)",
+    )
+    add_command('filter', cmd_filter, "Print versions matching SPEC.", with_spec=True)
+    add_command('select', cmd_select, "Print the highest version matching SPEC.", with_spec=True)
+    add_command('validate', cmd_validate, "Print invalid versions; fail if any.")
+    add_command('coerce', cmd_coerce, "Print the coerced version of each line.")
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Run a command; returns the exit status."""
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+
+    parser = make_parser()
+    # FILE arguments consumed along with SPEC leave later ones unparsed: `filter SPEC --skip-invalid FILE`.
+    args, extras = parser.parse_known_args(argv)
+    unknown = [arg for arg in extras if arg.startswith('-') and arg != '-']
+    if unknown:
+        parser.error("unrecognized arguments: %s" % ' '.join(unknown))
+    args.files.extend(extras)
+    if getattr(args, 'buffer_size', 1) < 1:
+        parser.error("--buffer-size must be positive")
+
+    reader = _Reader(args.files, stdin)
+    start = timeit.default_timer()
+    try:
+        status = args.func(args, reader, stdout, stderr)
+    except (ValueError, IOError) as e:
+        # An invalid SPEC, input line or file
+        stderr.write("%s: error: %s\n" % (parser.prog, e))
+        return 2
+
+    if args.stats:
+        elapsed = timeit.default_timer() - start
+        stderr.write("%s: %d lines in %.3fs (%.0f lines/s)\n" % (
+            args.command, reader.count, elapsed, reader.count / elapsed if elapsed else 0,
+        ))
+    return status
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Array-backed storage of many versions, for vectorized comparisons."""
+
+import array
+import bisect
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from . import base
+
+
+def _identifiers_key(identifiers):
+    return tuple(
+        base.NumericIdentifier(part) if part.isdigit() else base.AlphaIdentifier(part)
+        for part in identifiers
+    )
+
+
+def _ranks(values, key):
+    """Map each value to its rank, ordering values by key.
+
+    Returns (ranks, sorted_keys); values with equal keys share a rank.
+    """
+    keys = [key(value) for value in values]
+    sorted_keys = sorted(set(keys))
+    positions = dict((k, i) for i, k in enumerate(sorted_keys))
+    return [positions[k] for k in keys], sorted_keys
+
+
+class VersionArray(object):
+    """An immutable sequence of versions, stored as columns.
+
+    major, minor and patch are int64 columns; prerelease and build are ids
+    into the ``prereleases`` and ``builds`` lists of distinct tuples.
+    Comparisons, ``match()`` and ``argsort()`` work on whole columns, through
+    NumPy if installed, or pure Python ``array`` columns otherwise.
+
+    Comparison operators return a mask: a NumPy boolean array, or a list of bools.
+    """
+
+    def __init__(self, versions=(), use_numpy=None):
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ImportError("VersionArray(use_numpy=True) requires NumPy.")
+        self.uses_numpy = use_numpy
+
+        majors, minors, patches = [], [], []
+        prerelease_ids, build_ids = [], []
+        prereleases, builds = {}, {}
+        parse = base.Version.parse
+
+        for version in versions:
+            if isinstance(version, base.Version):
+                if version.partial:
+                    raise ValueError("Invalid partial version %r in a VersionArray." % version)
+                major, minor, patch, prerelease, build = version
+            else:
+                major, minor, patch, prerelease, build = parse(version)
+            majors.append(major)
+            minors.append(minor)
+            patches.append(patch)
+            prerelease_ids.append(prereleases.setdefault(prerelease, len(prereleases)))
+            build_ids.append(builds.setdefault(build, len(builds)))
+
+        self.prereleases = sorted(prereleases, key=prereleases.get)
+        self.builds = sorted(builds, key=builds.get)
+
+        # Ranks of the distinct prereleases / builds, in precedence order
+        prerelease_ranks, self._prerelease_keys = _ranks(
+            self.prereleases,
+            lambda prerelease: _identifiers_key(prerelease) if prerelease else base._RELEASE_KEY,
+        )
+        build_ranks = _ranks(self.builds, _identifiers_key)[0]
+
+        self.major = self._column(majors)
+        self.minor = self._column(minors)
+        self.patch = self._column(patches)
+        self.prerelease_ids = self._column(prerelease_ids)
+        self.build_ids = self._column(build_ids)
+        self.prerelease_ranks = self._column(self._take(prerelease_ranks, self.prerelease_ids))
+        self.build_ranks = self._column(self._take(build_ranks, self.build_ids))
+
+    def _column(self, values):
+        if self.uses_numpy:
+            return numpy.asarray(values, dtype=numpy.int64)
+        return array.array('q', values)
+
+    def _take(self, table, ids):
+        """Map a column of ids through a lookup table."""
+        if self.uses_numpy:
+            return numpy.asarray(table)[ids]
+        return [table[i] for i in ids]
+
+    def _mask(self, values):
+        if self.uses_numpy:
+            return numpy.asarray(values, dtype=bool)
+        return list(values)
+
+    def _constant(self, value):
+        if self.uses_numpy:
+            return numpy.full(len(self), value, dtype=bool)
+        return [value] * len(self)
+
+    def _and(self, first, second):
+        if self.uses_numpy:
+            return first & second
+        return [a and b for a, b in zip(first, second)]
+
+    def _or(self, first, second):
+        if self.uses_numpy:
+            return first | second
+        return [a or b for a, b in zip(first, second)]
+
+    def _invert(self, mask):
+        if self.uses_numpy:
+            return ~mask
+        return [not value for value in mask]
+
+    def __len__(self):
+        return len(self.major)
+
+    def __getitem__(self, index):
+        return base.Version._from_parts(
+            int(self.major[index]),
+            int(self.minor[index]),
+            int(self.patch[index]),
+            self.prereleases[self.prerelease_ids[index]],
+            self.builds[self.build_ids[index]],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return '<VersionArray: %d versions>' % len(self)
+
+    def argsort(self):
+        """Return the indices sorting the versions by their precedence_key."""
+        if self.uses_numpy:
+            return numpy.lexsort((self.build_ranks, self.prerelease_ranks, self.patch, self.minor, self.major))
+        rows = list(zip(self.major, self.minor, self.patch, self.prerelease_ranks, self.build_ranks))
+        return sorted(range(len(rows)), key=rows.__getitem__)
+
+    # Versions are compared through (major, minor, patch, prerelease_rank)
+    # "rank keys": a precedence key is converted to a rank key by locating
+    # its prerelease among the sorted distinct prerelease keys.
+
+    def _rank_key(self, key, after=False):
+        """The lowest rank key above (or equal to, unless ``after``) a precedence key."""
+        locate = bisect.bisect_right if after else bisect.bisect_left
+        return key[:3] + (locate(self._prerelease_keys, key[3]),)
+
+    def _ge(self, rank_key):
+        """Mask of versions whose rank key is greater or equal to rank_key."""
+        if not self.uses_numpy:
+            return [
+                row >= rank_key
+                for row in zip(self.major, self.minor, self.patch, self.prerelease_ranks)
+            ]
+        major, minor, patch, rank = rank_key
+        result = self.major > major
+        equal = self.major == major
+        result |= equal & (self.minor > minor)
+        equal &= self.minor == minor
+        result |= equal & (self.patch > patch)
+        equal &= self.patch == patch
+        result |= equal & (self.prerelease_ranks >= rank)
+        return result
+
+    def _check(self, version):
+        if not isinstance(version, base.Version):
+            raise TypeError("Can't compare a VersionArray to %r." % (version,))
+        if version.partial:
+            raise ValueError("Can't compare a VersionArray to partial version %r." % version)
+
+    def __ge__(self, version):
+        self._check(version)
+        return self._ge(self._rank_key(version._cmp_key))
+
+    def __gt__(self, version):
+        self._check(version)
+        return self._ge(self._rank_key(version._cmp_key, after=True))
+
+    def __lt__(self, version):
+        return self._invert(self >= version)
+
+    def __le__(self, version):
+        return self._invert(self > version)
+
+    def __eq__(self, version):
+        """Mask of versions equal to version, including their build metadata."""
+        self._check(version)
+        if version.prerelease not in self.prereleases or version.build not in self.builds:
+            return self._constant(False)
+        row = (
+            version.major,
+            version.minor,
+            version.patch,
+            self.prereleases.index(version.prerelease),
+            self.builds.index(version.build),
+        )
+        if not self.uses_numpy:
+            return [
+                values == row
+                for values in zip(self.major, self.minor, self.patch, self.prerelease_ids, self.build_ids)
+            ]
+        return (
+            (self.major == row[0])
+            & (self.minor == row[1])
+            & (self.patch == row[2])
+            & (self.prerelease_ids == row[3])
+            & (self.build_ids == row[4])
+        )
+
+    def __ne__(self, version):
+        return self._invert(self == version)
+
+    # Comparisons return masks, which can't be used as keys.
+    __hash__ = None
+
+    def match(self, spec):
+        """Mask of versions matching a BaseSpec."""
+        try:
+            compiled = spec.compile()
+        except NotImplementedError:
+            # Custom clauses may not support compilation.
+            return self._mask([spec.match(version) for version in self])
+
+        if base._RELEASE_KEY in self._prerelease_keys:
+            release_rank = self._prerelease_keys.index(base._RELEASE_KEY)
+        else:
+            release_rank = -1
+        if self.uses_numpy:
+            is_release = self.prerelease_ranks == release_rank
+        else:
+            is_release = [rank == release_rank for rank in self.prerelease_ranks]
+        return self._or(
+            self._and(is_release, self._match_layer(compiled.releases)),
+            self._and(self._invert(is_release), self._match_layer(compiled.prereleases)),
+        )
+
+    def _match_layer(self, layer):
+        """Mask of versions belonging to any interval of a layer."""
+        result = self._constant(False)
+        for interval in layer:
+            mask = self._constant(True)
+            if interval.low is not None:
+                low = self._rank_key(interval.low, after=not interval.low_closed)
+                mask = self._and(mask, self._ge(low))
+            if interval.high is not None:
+                high = self._rank_key(interval.high, after=interval.high_closed)
+                mask = self._and(mask, self._invert(self._ge(high)))
+            if not interval.builds.is_all():
+                allowed = [build in interval.builds for build in self.builds]
+                mask = self._and(mask, self._mask(self._take(allowed, self.build_ids)))
+            result = self._or(result, mask)
+        return result
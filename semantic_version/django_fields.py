@@ -2,10 +2,16 @@
 # Copyright (c) The python-semanticversion project
 # This code is distributed under the two-clause BSD License.
 
+import binascii
+import collections
 import warnings
 
 import django
-from django.db import models
+from django.core.exceptions import EmptyResultSet, FieldError
+from django.db import NotSupportedError, models
+from django.db.models.expressions import Col
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.sql.compiler import SQLUpdateCompiler
 
 if django.VERSION >= (3, 0):
     # See https://docs.djangoproject.com/en/dev/releases/3.0/#features-deprecated-in-3-0
@@ -17,11 +23,28 @@ from . import base
 
 
 class SemVerField(models.CharField):
+    # LRUCache of the values converted by to_python(), keyed on the field
+    # settings and the raw value; shared by all fields, unless overridden.
+    # Versions and specs are immutable: rows can share them.
+    parse_cache = base.LRUCache(maxsize=4096)
 
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('max_length', 200)
         super(SemVerField, self).__init__(*args, **kwargs)
 
+    def _parse_cached(self, key, parse, value):
+        """Return parse(value), memoized in parse_cache under (key, value)."""
+        cache = self.parse_cache
+        if cache is None:
+            return parse(value)
+
+        key = (key, value)
+        result = cache.get(key)
+        if result is None:
+            result = parse(value)
+            cache.put(key, result)
+        return result
+
     def from_db_value(self, value, expression, connection, *args):
         """Convert from the database format.
 
@@ -60,6 +83,9 @@ class VersionField(SemVerField):
                 stacklevel=2,
             )
         self.coerce = kwargs.pop('coerce', False)
+        self.sortable = kwargs.pop('sortable', False)
+        if self.sortable and self.partial:
+            raise ValueError("Partial versions can't be sorted by the database.")
         super(VersionField, self).__init__(*args, **kwargs)
 
     def deconstruct(self):
@@ -67,20 +93,307 @@ class VersionField(SemVerField):
         name, path, args, kwargs = super(VersionField, self).deconstruct()
         kwargs['partial'] = self.partial
         kwargs['coerce'] = self.coerce
+        if self.sortable:
+            kwargs['sortable'] = True
         return name, path, args, kwargs
 
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(VersionField, self).contribute_to_class(cls, name, *args, **kwargs)
+        if self.sortable:
+            setattr(cls, self.attname, SortableVersionDescriptor(self))
+            key_field = VersionKeyField(source=name, max_length=4 * self.max_length, null=True)
+            cls.add_to_class(self.sort_key_name, key_field)
+
+    @property
+    def sort_key_name(self):
+        return '%s_key' % self.name
+
+    @property
+    def sort_key_field(self):
+        return self.model._meta.get_field(self.sort_key_name)
+
+    def get_col(self, alias, output_field=None):
+        # Queries filter and sort the key column, and read the text column of rows without a key.
+        if self.sortable:
+            return VersionKeyCol(alias, self, self.sort_key_field)
+        return super(VersionField, self).get_col(alias, output_field)
+
+    def get_placeholder(self, value, compiler, connection):
+        # QuerySet.update(), bulk_update() and save(update_fields=...) don't
+        # compute the key: they must set it along with the text.
+        if self.sortable and isinstance(compiler, SQLUpdateCompiler):
+            key_field = self.sort_key_field
+            if not any(field is key_field for field, _model, _value in compiler.query.values):
+                raise FieldError(
+                    "Updating %s.%s requires updating %r as well."
+                    % (self.model._meta.object_name, self.name, self.sort_key_name)
+                )
+        return '%s'
+
+    def update_sort_keys(self, queryset=None, batch_size=500):
+        """Store the sort key of each row, computed from its text column.
+
+        Use it in a data migration, after adding sortable=True to a field.
+        Returns the number of updated rows.
+        """
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+
+        rows = queryset.values_list('pk', self.name)
+        pks = collections.defaultdict(list)
+        for pk, version in rows.iterator():
+            pks[version].append(pk)
+
+        count = 0
+        for version, version_pks in pks.items():
+            for start in range(0, len(version_pks), batch_size):
+                count += self.model._default_manager.filter(
+                    pk__in=version_pks[start:start + batch_size],
+                ).update(**{self.sort_key_name: version})
+        return count
+
     def to_python(self, value):
         """Converts any value to a base.Version field."""
         if value is None or value == '':
             return value
         if isinstance(value, base.Version):
             return value
+        return self._parse_cached((self.__class__, self.coerce, self.partial), self._parse_version, value)
+
+    def _parse_version(self, value):
         if self.coerce:
             return base.Version.coerce(value, partial=self.partial)
         else:
             return base.Version(value, partial=self.partial)
 
 
+# Suffixes of version keys, below hexadecimal digits: keys still sort like sortable bytes.
+RELEASE_KEY_SUFFIX = '.'
+PRERELEASE_KEY_SUFFIX = '-'
+
+# Maximum number of keys in each IN (...) list of the matches lookup.
+MATCHES_IN_LIST_SIZE = 1000
+
+
+def _version_key(version):
+    suffix = PRERELEASE_KEY_SUFFIX if version.prerelease else RELEASE_KEY_SUFFIX
+    return binascii.hexlify(version.to_sortable_bytes()).decode('ascii') + suffix
+
+
+def _hex_bound(data):
+    return binascii.hexlify(data).decode('ascii')
+
+
+class VersionKeyCol(Col):
+    """The key column of a sortable VersionField, compiled from its VersionKeyField.
+
+    Targets the VersionField, which loads the model attribute. Selects the
+    text column for rows without a key, e.g. before running
+    VersionField.update_sort_keys(): they read their version, and saving
+    them stores their key. Subqueries select the key, to compare it with
+    other keys.
+    """
+
+    def as_sql(self, compiler, connection):
+        return compiler.compile(Col(self.alias, self.output_field))
+
+    def select_format(self, compiler, sql, params):
+        sql, params = super(VersionKeyCol, self).select_format(compiler, sql, params)
+        if compiler.query.subquery:
+            return sql, params
+        text_sql, text_params = compiler.compile(Col(self.alias, self.target))
+        return 'COALESCE(%s, %s)' % (sql, text_sql), list(params) + list(text_params)
+
+    def get_db_converters(self, connection):
+        return self.output_field.get_db_converters(connection)
+
+
+class SortableVersionDescriptor(DeferredAttribute):
+    """The value of a sortable VersionField.
+
+    Loading it loads its key as well: saving a model with deferred fields
+    then updates both columns.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+        instance.__dict__.setdefault(self.field.sort_key_name, None)
+
+
+class VersionKeyDescriptor(object):
+    """The value of a VersionKeyField: the version of its source field."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.field.source)
+
+    def __set__(self, instance, value):
+        # Loaded keys are ignored, but mark the field as loaded.
+        instance.__dict__[self.field.attname] = value
+
+
+class VersionKeyField(models.CharField):
+    """Stores a key ordered by version precedence.
+
+    The key is Version.to_sortable_bytes() in hexadecimal, followed by
+    RELEASE_KEY_SUFFIX or PRERELEASE_KEY_SUFFIX.
+
+    Added by VersionField(sortable=True); its value is always the version
+    of that field, whose key is written when saving a model.
+    """
+    description = _("Version sort key")
+
+    # Text lookups would compare encoded keys.
+    supported_lookups = ('exact', 'gt', 'gte', 'lt', 'lte', 'in', 'range', 'isnull', 'matches')
+
+    def __init__(self, *args, **kwargs):
+        self.source = kwargs.pop('source')
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('db_index', True)
+        super(VersionKeyField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        """Handle django.db.migrations."""
+        name, path, args, kwargs = super(VersionKeyField, self).deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        # Migrations list the key field, which its VersionField adds as well.
+        if any(field.name == name for field in cls._meta.local_fields):
+            return
+        super(VersionKeyField, self).contribute_to_class(cls, name, *args, **kwargs)
+        setattr(cls, self.attname, VersionKeyDescriptor(self))
+
+    @property
+    def source_field(self):
+        return self.model._meta.get_field(self.source)
+
+    def get_lookup(self, lookup_name):
+        if lookup_name not in self.supported_lookups:
+            return None
+        return super(VersionKeyField, self).get_lookup(lookup_name)
+
+    def from_db_value(self, value, expression, connection, *args):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        """Converts a hexadecimal key, or the text of a row without a key, to a base.Version."""
+        if value is None or value == '' or isinstance(value, base.Version):
+            return value
+        try:
+            # Keys decode to the versions of the source field: share its cache.
+            return self.source_field._parse_cached(self.__class__, self._decode, value)
+        except ValueError:
+            return self.source_field.to_python(value)
+
+    @staticmethod
+    def _decode(value):
+        if value[-1:] not in (RELEASE_KEY_SUFFIX, PRERELEASE_KEY_SUFFIX):
+            raise ValueError("Invalid version sort key: %r" % value)
+        try:
+            data = binascii.unhexlify(value[:-1])
+        except (TypeError, binascii.Error):
+            raise ValueError("Invalid version sort key: %r" % value)
+        return base.Version.from_sortable_bytes(data)
+
+    def get_prep_value(self, obj):
+        if obj is None or obj == '':
+            return obj
+        if not isinstance(obj, base.Version):
+            # Lookups use the versions accepted by the source field
+            obj = self.source_field.to_python(obj)
+        return _version_key(obj)
+
+    def value_to_string(self, obj):
+        return self.get_prep_value(self.value_from_object(obj))
+
+    def run_validators(self, value):
+        return super(VersionKeyField, self).run_validators(self.get_prep_value(value))
+
+
+@VersionKeyField.register_lookup
+class MatchesLookup(models.Lookup):
+    """Filter versions matching a spec: version__matches=SimpleSpec('^1.2').
+
+    The compiled spec becomes ranges of keys, for each of its release and
+    prerelease layers; specs which can't be compiled are matched in Python,
+    against the distinct versions of the column. That query runs whenever
+    the SQL is built, including str(queryset.query), and its matching keys
+    become IN (...) lists of at most MATCHES_IN_LIST_SIZE keys.
+    """
+    lookup_name = 'matches'
+    prepare_rhs = False
+
+    def get_spec(self):
+        if isinstance(self.rhs, base.BaseSpec):
+            return self.rhs
+        return base.BaseSpec.parse(self.rhs)
+
+    def as_sql(self, compiler, connection):
+        lhs, params = self.process_lhs(compiler, connection)
+        spec = self.get_spec()
+        try:
+            compiled = spec.compile()
+        except NotImplementedError:
+            # Custom clauses may not support compilation.
+            return self._python_sql(lhs, params, spec, connection)
+
+        # One condition per range: databases can use the index for each.
+        conditions = []
+        condition_params = []
+        for ranges, suffix in [
+                (compiled.byte_ranges(prereleases=False), RELEASE_KEY_SUFFIX),
+                (compiled.byte_ranges(releases=False), PRERELEASE_KEY_SUFFIX),
+        ]:
+            for start, stop in ranges:
+                condition = ['%s LIKE %%s' % lhs]
+                condition_params.extend(params + ['%' + suffix])
+                if start:
+                    condition.append('%s >= %%s' % lhs)
+                    condition_params.extend(params + [_hex_bound(start)])
+                if stop is not None:
+                    condition.append('%s < %%s' % lhs)
+                    condition_params.extend(params + [_hex_bound(stop)])
+                conditions.append('(%s)' % ' AND '.join(condition))
+
+        if not conditions:
+            raise EmptyResultSet
+        return ' OR '.join(conditions), condition_params
+
+    def _python_sql(self, lhs, params, spec, connection):
+        field = self.lhs.target
+        versions = field.model._default_manager.using(connection.alias).values_list(field.name, flat=True).distinct()
+        keys = sorted(set(
+            _version_key(version) for version in versions
+            if isinstance(version, base.Version) and spec.match(version)
+        ))
+        if not keys:
+            raise EmptyResultSet
+
+        # Some databases limit the size of IN lists, e.g. Oracle.
+        size = min(MATCHES_IN_LIST_SIZE, connection.ops.max_in_list_size() or MATCHES_IN_LIST_SIZE)
+        chunks = [keys[i:i + size] for i in range(0, len(keys), size)]
+        max_params = connection.features.max_query_params
+        if max_params is not None and len(keys) + len(params) * len(chunks) > max_params:
+            raise NotSupportedError(
+                "%d versions match %s, more than the %d query parameters supported by %s: "
+                "use a spec which can be compiled." % (len(keys), spec, max_params, connection.vendor)
+            )
+
+        conditions = []
+        condition_params = []
+        for chunk in chunks:
+            conditions.append('%s IN (%s)' % (lhs, ', '.join(['%s'] * len(chunk))))
+            condition_params.extend(params + chunk)
+        return ' OR '.join(conditions), condition_params
+
+
 class SpecField(SemVerField):
     default_error_messages = {
         'invalid': _("Enter a valid version number spec list in ==X.Y.Z,>=A.B.C format."),
@@ -104,4 +417,7 @@ class SpecField(SemVerField):
             return value
         if isinstance(value, base.BaseSpec):
             return value
+        return self._parse_cached((self.__class__, self.syntax), self._parse_spec, value)
+
+    def _parse_spec(self, value):
         return base.BaseSpec.parse(value, syntax=self.syntax)
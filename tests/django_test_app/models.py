@@ -24,3 +24,7 @@ if django_loaded:
     class CoerceVersionModel(models.Model):
         version = semver_fields.VersionField(verbose_name='my version', coerce=True)
         partial = semver_fields.VersionField(verbose_name='partial version', coerce=True, partial=True)
+
+    class SortableVersionModel(models.Model):
+        version = semver_fields.VersionField(verbose_name='my version', sortable=True)
+        coerced = semver_fields.VersionField(verbose_name='coerced version', coerce=True, sortable=True, blank=True)
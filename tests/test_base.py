@@ -5,6 +5,9 @@
 
 """Test the various functions from 'base'."""
 
+import base64
+import copy
+import pickle
 import unittest
 import sys
 
@@ -414,6 +417,151 @@ class VersionTestCase(unittest.TestCase):
         subv = v.truncate()
         self.assertEqual(type(subv), MyVersion)
 
+    def test_subclass_state(self):
+        class LabeledVersion(base.Version):
+            __slots__ = ['label']
+
+            def __init__(self, *args, **kwargs):
+                label = kwargs.pop('label', None)
+                super(LabeledVersion, self).__init__(*args, **kwargs)
+                object.__setattr__(self, 'label', label)
+
+        v = LabeledVersion('1.2.3', label='stable')
+        self.assertEqual('stable', v.label)
+        self.assertEqual(base.Version('1.2.3'), v)
+        with self.assertRaises(AttributeError):
+            v.label = 'unstable'
+
+        # Versions built from validated components still run __init__.
+        for derived in [v.next_major(), v.next_minor(), v.next_patch(), v.truncate('minor'),
+                        LabeledVersion.coerce('1.2'), LabeledVersion.parse_many(['1.2.3'])[0]]:
+            with self.subTest(version=derived):
+                self.assertIs(LabeledVersion, type(derived))
+                self.assertIsNone(derived.label)
+
+    def test_lazy_precedence_keys(self):
+        v = base.Version('1.2.3-alpha+build')
+        self.assertIsNone(v._cmp_precedence_key)
+        self.assertIsNone(v._sort_precedence_key)
+        str(v)
+        hash(v)
+        self.assertIsNone(v._cmp_precedence_key)
+
+        # Decided by the packed keys
+        self.assertTrue(v < base.Version('1.2.3'))
+        self.assertIsNone(v._cmp_precedence_key)
+
+        self.assertTrue(v < base.Version('1.2.3-beta'))
+        self.assertIsNotNone(v._cmp_precedence_key)
+        self.assertIsNone(v._sort_precedence_key)
+
+        key = v.precedence_key
+        self.assertIs(key, v.precedence_key)
+
+    def test_packed_key(self):
+        versions = [
+            base.Version(text)
+            for text in ['0.0.0-0', '0.0.0', '0.0.1-rc.1', '0.0.1', '0.1.0', '1.0.0-alpha', '1.0.0', '%d.0.0' % 2 ** 70]
+        ]
+        keys = [v.packed_key for v in versions]
+        self.assertEqual(sorted(keys), keys)
+        self.assertEqual(len(versions), len(set(keys)))
+
+        self.assertEqual(base.Version('1.0.0-alpha').packed_key, base.Version('1.0.0-beta+b2').packed_key)
+        self.assertEqual(base.Version('1.0.0').packed_key, base.Version('1.0.0+b2').packed_key)
+        self.assertIsNone(base.Version('1.0.%d' % 2 ** 64).packed_key)
+        self.assertIsNone(base.Version('1.0', partial=True).packed_key)
+
+        # Versions which can't be packed still compare
+        self.assertLess(base.Version('1.0.0'), base.Version('1.0.%d' % 2 ** 64))
+        self.assertGreater(base.Version('1.%d.0' % 2 ** 64), base.Version('1.0.%d' % 2 ** 64))
+
+    def test_immutable(self):
+        v = base.Version('1.2.3-alpha')
+        with self.assertRaises(AttributeError):
+            v.major = 2
+        with self.assertRaises(AttributeError):
+            v.prerelease = ()
+        with self.assertRaises(AttributeError):
+            v.extra = 42
+        with self.assertRaises(AttributeError):
+            del v.patch
+        self.assertEqual(base.Version('1.2.3-alpha'), v)
+        self.assertFalse(hasattr(v, '__dict__'))
+
+    def test_pickle(self):
+        for text in ['1.2.3', '1.2.3-alpha.1+build.4']:
+            v = base.Version(text)
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                with self.subTest(text=text, protocol=protocol):
+                    loaded = pickle.loads(pickle.dumps(v, protocol))
+                    self.assertEqual(v, loaded)
+                    self.assertEqual(v.precedence_key, loaded.precedence_key)
+                    self.assertEqual(v.build, loaded.build)
+
+    def test_pickle_previous_format(self):
+        # Version('1.2.3-rc.1+b'), pickled by 2.10.0 with protocol 2
+        data = base64.b64decode(
+            'gAJjc2VtYW50aWNfdmVyc2lvbi5iYXNlClZlcnNpb24KcQApgXEBfXECKFgFAAAAbWFqb3JxA0sBWAUAAABtaW5vcnEESwJY'
+            'BQAAAHBhdGNocQVLA1gKAAAAcHJlcmVsZWFzZXEGWAIAAAByY3EHWAEAAAAxcQiGcQlYBQAAAGJ1aWxkcQpYAQAAAGJxC4Vx'
+            'DFgHAAAAcGFydGlhbHENiVgTAAAAX2NtcF9wcmVjZWRlbmNlX2tleXEOKEsBSwJLA2NzZW1hbnRpY192ZXJzaW9uLmJhc2UK'
+            'QWxwaGFJZGVudGlmaWVyCnEPKYFxEE59cRFYBQAAAHZhbHVlcRJjX2NvZGVjcwplbmNvZGUKcRNYAgAAAHJjcRRYBgAAAGxh'
+            'dGluMXEVhnEWUnEXc4ZxGGJjc2VtYW50aWNfdmVyc2lvbi5iYXNlCk51bWVyaWNJZGVudGlmaWVyCnEZKYFxGk59cRtoEksB'
+            'c4ZxHGKGcR10cR5YFAAAAF9zb3J0X3ByZWNlZGVuY2Vfa2V5cR8oSwFLAksDaA8pgXEgTn1xIWgSaBNYAgAAAHJjcSJoFYZx'
+            'I1JxJHOGcSViaBkpgXEmTn1xJ2gSSwFzhnEoYoZxKWgPKYFxKk59cStoEmgTaAtoFYZxLFJxLXOGcS5ihXEvdHEwdWIu'
+        )
+        loaded = pickle.loads(data)
+        expected = base.Version('1.2.3-rc.1+b')
+        self.assertEqual(expected, loaded)
+        self.assertEqual(expected.precedence_key, loaded.precedence_key)
+        self.assertEqual(expected.build, loaded.build)
+        self.assertEqual(expected, pickle.loads(pickle.dumps(loaded)))
+
+    def test_copy(self):
+        v = base.Version('1.2.3-alpha.1+build.4')
+        self.assertEqual(v, copy.copy(v))
+        self.assertEqual(v, copy.deepcopy(v))
+        self.assertEqual(type(v), type(copy.copy(v)))
+        # Versions are immutable
+        self.assertIs(v, copy.copy(v))
+        self.assertIs(v, copy.deepcopy(v))
+
+    def test_sortable_bytes(self):
+        texts = [
+            '0.0.0-0', '0.0.0-0.0', '0.0.0-1', '0.0.0-2', '0.0.0-10', '0.0.0-256', '0.0.0-a',
+            '0.0.0-a.0', '0.0.0-a-b', '0.0.0-ab', '0.0.0-b', '0.0.0', '0.0.0+0', '0.0.0+00',
+            '0.0.1', '0.1.0-rc.1', '0.1.0', '1.0.0', '255.0.0', '256.0.0', '%d.0.0' % 2 ** 70,
+        ]
+        encoded = [base.Version(text).to_sortable_bytes() for text in texts]
+        self.assertEqual(sorted(encoded), encoded)
+        self.assertEqual(len(texts), len(set(encoded)))
+        for text, data in zip(texts, encoded):
+            with self.subTest(version=text):
+                self.assertEqual(text, str(base.Version.from_sortable_bytes(data)))
+
+    def test_sortable_bytes_invalid(self):
+        with self.assertRaises(ValueError):
+            base.Version('1.2', partial=True).to_sortable_bytes()
+        with self.assertRaises(ValueError):
+            base.Version('%d.0.0' % 2 ** 2048).to_sortable_bytes()
+
+        invalids = [
+            b'', b'\x01', b'\x00\x00\x00', b'\x00\x00\x00\x00', b'\x00\x00\x00\xff\x00\x00',
+            # Characters outside of [0-9A-Za-z-]
+            b'\x01\x01\x00\x00\x02a.b\x00\x00\x00',
+            b'\x01\x01\x00\x00\x02a b\x00\x00\x00',
+            b'\x01\x01\x00\xff\x02a+b\x00\x00',
+            # Empty, or number-like, alphanumeric identifiers
+            b'\x01\x01\x00\x00\x02\x00\x00\x00',
+            b'\x01\x01\x00\x00\x0212\x00\x00\x00',
+            b'\x01\x01\x00\x00\x02012\x00\x00\x00',
+            b'\x01\x01\x00\xff\x020\x00\x00',
+        ]
+        for data in invalids:
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    base.Version.from_sortable_bytes(data)
+
 
 class SpecItemTestCase(unittest.TestCase):
     if sys.version_info[0] <= 2:
@@ -625,6 +773,186 @@ class CoerceTestCase(unittest.TestCase):
     def test_invalid(self):
         self.assertRaises(ValueError, base.Version.coerce, 'v1')
 
+    def test_invalid_identifiers(self):
+        for sample in ['0.1.0-01', '0.1.0a..2', '0.1.0..2', '0.1.0+2++3']:
+            with self.subTest(sample=sample):
+                with self.assertRaises(ValueError):
+                    base.Version.coerce(sample)
+
+    def test_partial(self):
+        self.assertEqual((0, 1, None, None, None), tuple(base.Version.coerce('00.01', partial=True)))
+        self.assertEqual((0, 1, None, ('a2',), ('3',)), tuple(base.Version.coerce('0.1a2+3', partial=True)))
+
+    def test_coerce_many(self):
+        self.assertEqual(
+            [base.Version('0.1.0'), base.Version('0.1.0+2'), base.Version('0.1.0-a2.3')],
+            base.Version.coerce_many(['0.1', '0.1.0.2', '0.1.0a2.3']),
+        )
+
+        mixed = ['0.1', 'v1', '0.1.0-01', '1.2']
+        with self.assertRaises(ValueError):
+            base.Version.coerce_many(mixed)
+        self.assertEqual(
+            [base.Version('0.1.0'), base.Version('1.2.0')],
+            base.Version.coerce_many(mixed, errors='skip'),
+        )
+        versions, errors = base.Version.coerce_many(mixed, errors='collect')
+        self.assertEqual([base.Version('0.1.0'), base.Version('1.2.0')], versions)
+        self.assertEqual([(1, 'v1'), (2, '0.1.0-01')], [error[:2] for error in errors])
+        self.assertIsInstance(errors[0][2], ValueError)
+
+        with self.assertRaises(ValueError):
+            base.Version.coerce_many(mixed, errors='ignore')
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    def test_eviction(self):
+        cache = base.LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        # Touch 'a', making 'b' the least recently used entry.
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(2, len(cache))
+
+    def test_stats(self):
+        cache = base.LRUCache(maxsize=10)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual(base.CacheInfo(hits=2, misses=1, maxsize=10, currsize=1), cache.cache_info())
+
+        cache.clear()
+        self.assertEqual(base.CacheInfo(hits=0, misses=0, maxsize=10, currsize=0), cache.cache_info())
+
+    def test_disabled(self):
+        cache = base.LRUCache(maxsize=0)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            base.LRUCache(maxsize=-1)
+
+
+class ParseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = base.LRUCache(maxsize=10)
+        base.Version.parse_cache = self.cache
+
+    def tearDown(self):
+        base.Version.parse_cache = None
+
+    def test_parse(self):
+        first = base.Version.parse('1.2.3-alpha+b4')
+        second = base.Version.parse('1.2.3-alpha+b4')
+        self.assertEqual((1, 2, 3, ('alpha',), ('b4',)), first)
+        self.assertIs(first, second)
+        self.assertEqual((1, 1), self.cache.cache_info()[:2])
+
+    def test_version(self):
+        v1 = base.Version('1.2.3')
+        v2 = base.Version('1.2.3')
+        self.assertEqual(v1, v2)
+        self.assertEqual(1, self.cache.hits)
+
+    def test_partial_is_distinct(self):
+        base.Version.parse('1.2.3')
+        self.assertEqual((1, 2, 3, None, None), base.Version.parse('1.2.3', partial=True))
+        self.assertEqual(0, self.cache.hits)
+
+    def test_invalid_not_cached(self):
+        for _i in range(2):
+            with self.assertRaises(ValueError):
+                base.Version('1.2')
+        self.assertEqual(0, len(self.cache))
+
+
+class CoerceCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = base.LRUCache(maxsize=10)
+        base.Version.coerce_cache = self.cache
+
+    def tearDown(self):
+        base.Version.coerce_cache = None
+
+    def test_coerce(self):
+        first = base.Version.coerce('1.2a1')
+        second = base.Version.coerce('1.2a1')
+        self.assertEqual(base.Version('1.2.0-a1'), first)
+        self.assertIs(first, second)
+        self.assertEqual((1, 1), self.cache.cache_info()[:2])
+
+    def test_partial_is_distinct(self):
+        base.Version.coerce('1.2')
+        self.assertEqual((1, 2, None, None, None), tuple(base.Version.coerce('1.2', partial=True)))
+        self.assertEqual(0, self.cache.hits)
+
+    def test_invalid_not_cached(self):
+        for _i in range(2):
+            with self.assertRaises(ValueError):
+                base.Version.coerce('v1')
+        self.assertEqual(0, len(self.cache))
+
+
+class SpecParseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = base.LRUCache(maxsize=2)
+        self.default_cache = base.BaseSpec.parse_cache
+        base.BaseSpec.parse_cache = self.cache
+
+    def tearDown(self):
+        base.BaseSpec.parse_cache = self.default_cache
+
+    def test_default(self):
+        self.assertEqual(1024, self.default_cache.maxsize)
+
+    def test_shared_clause(self):
+        first = base.SimpleSpec('^1.2.0')
+        second = base.BaseSpec.parse('^1.2.0')
+        self.assertIs(first.clause, second.clause)
+        self.assertEqual(first, second)
+        self.assertEqual((1, 1), self.cache.cache_info()[:2])
+
+    def test_shared_compiled(self):
+        first = base.SimpleSpec('^1.2.0')
+        self.assertTrue(first.match(base.Version('1.3.0')))
+        second = base.SimpleSpec('^1.2.0')
+        self.assertIs(first._get_compiled(), second._get_compiled())
+
+        # A replaced clause is compiled again.
+        second.clause = base.SimpleSpec('<1.0.0').clause
+        second._compiled = None
+        self.assertFalse(second.match(base.Version('1.3.0')))
+        self.assertTrue(first.match(base.Version('1.3.0')))
+
+    def test_syntax_is_distinct(self):
+        simple = base.SimpleSpec('<1.2.0')
+        npm = base.NpmSpec('<1.2.0')
+        self.assertIsNot(simple.clause, npm.clause)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_eviction(self):
+        for text in ['>=1.0.0', '>=2.0.0', '>=3.0.0', '>=1.0.0']:
+            base.SimpleSpec(text)
+        self.assertEqual((0, 4, 2, 2), self.cache.cache_info())
+
+    def test_invalid_not_cached(self):
+        for _i in range(2):
+            with self.assertRaises(ValueError):
+                base.SimpleSpec('>=1.x.y')
+        self.assertEqual(0, len(self.cache))
+
+    def test_disabled(self):
+        base.BaseSpec.parse_cache = None
+        self.assertIsNot(base.SimpleSpec('^1.2.0').clause, base.SimpleSpec('^1.2.0').clause)
+
 
 class SpecTestCase(unittest.TestCase):
     if sys.version_info[0] <= 2:
@@ -805,6 +1133,65 @@ class SpecTestCase(unittest.TestCase):
             1,
             len(set([base.Spec('>=0.1.1'), base.Spec('>=0.1.1')])))
 
+    def test_pickle(self):
+        specs = [
+            base.Spec('>=0.1.1,!=0.1.3-rc1'),
+            base.SimpleSpec('^1.2.3'),
+            base.NpmSpec('>=1.2.3 <2.0.0 || ^4.17.0-beta.1'),
+        ]
+        for spec in specs:
+            # Compiled intervals are not pickled
+            spec.compile()
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                with self.subTest(spec=str(spec), protocol=protocol):
+                    data = pickle.dumps(spec, protocol)
+                    loaded = pickle.loads(data)
+                    self.assertEqual(type(spec), type(loaded))
+                    self.assertEqual(spec, loaded)
+                    self.assertEqual(spec.clause, loaded.clause)
+                    self.assertLess(len(data), 200)
+
+    def test_pickle_previous_format(self):
+        # NpmSpec('^1.2.0 || 3.x'), pickled by 2.10.0 with protocol 2
+        data = base64.b64decode(
+            'gAJjc2VtYW50aWNfdmVyc2lvbi5iYXNlCk5wbVNwZWMKcQApgXEBfXECKFgKAAAAZXhwcmVzc2lvbnEDWA0AAABeMS4yLjAg'
+            'fHwgMy54cQRYBgAAAGNsYXVzZXEFY3NlbWFudGljX3ZlcnNpb24uYmFzZQpBbnlPZgpxBimBcQdOfXEIWAcAAABjbGF1c2Vz'
+            'cQljX19idWlsdGluX18KZnJvemVuc2V0CnEKXXELKGNzZW1hbnRpY192ZXJzaW9uLmJhc2UKQWxsT2YKcQwpgXENTn1xDmgJ'
+            'aApdcQ8oY3NlbWFudGljX3ZlcnNpb24uYmFzZQpSYW5nZQpxECmBcRFOfXESKFgIAAAAb3BlcmF0b3JxE1gCAAAAPj1xFFgG'
+            'AAAAdGFyZ2V0cRVjc2VtYW50aWNfdmVyc2lvbi5iYXNlClZlcnNpb24KcRYpgXEXfXEYKFgFAAAAbWFqb3JxGUsBWAUAAABt'
+            'aW5vcnEaSwJYBQAAAHBhdGNocRtLAFgKAAAAcHJlcmVsZWFzZXEcKVgFAAAAYnVpbGRxHSlYBwAAAHBhcnRpYWxxHolYEwAA'
+            'AF9jbXBfcHJlY2VkZW5jZV9rZXlxHyhLAUsCSwBjc2VtYW50aWNfdmVyc2lvbi5iYXNlCk1heElkZW50aWZpZXIKcSApgXEh'
+            'hXEidHEjWBQAAABfc29ydF9wcmVjZWRlbmNlX2tleXEkKEsBSwJLAGggKYFxJYVxJil0cSd1YlgRAAAAcHJlcmVsZWFzZV9w'
+            'b2xpY3lxKFgKAAAAc2FtZS1wYXRjaHEpWAwAAABidWlsZF9wb2xpY3lxKlgIAAAAaW1wbGljaXRxK3WGcSxiaBApgXEtTn1x'
+            'LihoE1gBAAAAPHEvaBVoFimBcTB9cTEoaBlLAmgaSwBoG0sAaBwpaB0paB6JaB8oSwJLAEsAaCApgXEyhXEzdHE0aCQoSwJL'
+            'AEsAaCApgXE1hXE2KXRxN3ViaChoKWgqaCt1hnE4YmWFcTlScTpzhnE7YmgMKYFxPE59cT1oCWgKXXE+KGgQKYFxP059cUAo'
+            'aBNoL2gVaBYpgXFBfXFCKGgZSwRoGksAaBtLAGgcKWgdKWgeiWgfKEsESwBLAGggKYFxQ4VxRHRxRWgkKEsESwBLAGggKYFx'
+            'RoVxRyl0cUh1YmgoaCloKmgrdYZxSWJoECmBcUpOfXFLKGgTaBRoFWgWKYFxTH1xTShoGUsDaBpLAGgbSwBoHCloHSloHolo'
+            'HyhLA0sASwBoICmBcU6FcU90cVBoJChLA0sASwBoICmBcVGFcVIpdHFTdWJoKGgpaCpoK3WGcVRiZYVxVVJxVnOGcVdiZYVx'
+            'WFJxWXOGcVpidWIu'
+        )
+        loaded = pickle.loads(data)
+        expected = base.NpmSpec('^1.2.0 || 3.x')
+        self.assertEqual(expected, loaded)
+        self.assertEqual(expected.clause, loaded.clause)
+        for text in ['1.1.0', '1.2.0', '1.9.0-rc.1', '2.0.0', '3.4.5', '4.0.0']:
+            with self.subTest(version=text):
+                self.assertEqual(expected.match(base.Version(text)), loaded.match(base.Version(text)))
+
+    def test_pickle_clauses(self):
+        clauses = [
+            base.SimpleSpec('>=0.1.1,!=0.1.3-rc1').clause,
+            base.NpmSpec('>=1.2.3 <2.0.0 || ^4.17.0-beta.1').clause,
+            base.Range(base.Range.OP_NEQ, base.Version('1.2.3+b4')),
+            base.Never(),
+            base.Always(),
+        ]
+        for clause in clauses:
+            with self.subTest(clause=clause):
+                loaded = pickle.loads(pickle.dumps(clause))
+                self.assertEqual(clause, loaded)
+                self.assertEqual(clause.compile(), loaded.compile())
+
 
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
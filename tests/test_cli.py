@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Test the command-line tools."""
+
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from semantic_version import base, cli
+
+
+class CliTestCase(unittest.TestCase):
+    versions = [
+        '2.0.0', '0.1.0', '0.1.0+b1', '1.0.0-rc.1', '0.1.1', '1.0.0-alpha', '1.0.0', '0.10.0', '0.2.0',
+    ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_cli(self, argv, lines=()):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        stdin = io.StringIO(u''.join('%s\n' % line for line in lines))
+        status = cli.main(argv, stdin=stdin, stdout=stdout, stderr=stderr)
+        return status, stdout.getvalue().splitlines(), stderr.getvalue()
+
+    def write_file(self, name, lines):
+        path = os.path.join(self.tmpdir, name)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(u''.join('%s\n' % line for line in lines))
+        return path
+
+    def test_sort(self):
+        expected = [
+            '0.1.0', '0.1.0+b1', '0.1.1', '0.2.0', '0.10.0', '1.0.0-alpha', '1.0.0-rc.1', '1.0.0', '2.0.0',
+        ]
+        self.assertEqual((0, expected, ''), self.run_cli(['sort'], self.versions))
+        self.assertEqual((0, expected[::-1], ''), self.run_cli(['sort', '--reverse'], self.versions))
+
+    def test_sort_build(self):
+        # Build identifiers follow Version.to_sortable_bytes(): leading zeroes sort as alphanumeric.
+        self.assertEqual(
+            (0, ['1.0.0+1', '1.0.0+2', '1.0.0+001', '1.0.0+01'], ''),
+            self.run_cli(['sort'], ['1.0.0+2', '1.0.0+001', '1.0.0+01', '1.0.0+1']),
+        )
+
+    def test_external_sort(self):
+        rnd = random.Random(1)
+        texts = [
+            '%d.%d.%d%s' % (rnd.randint(0, 3), rnd.randint(0, 3), rnd.randint(0, 3), rnd.choice(['', '-rc.1', '+b2']))
+            for _i in range(500)
+        ]
+        expected = [str(v) for v in sorted(base.Version.parse_many(texts), key=lambda v: v.precedence_key)]
+
+        original_fan_in = cli.MERGE_FAN_IN
+        cli.MERGE_FAN_IN = 3
+        try:
+            self.assertEqual((0, expected, ''), self.run_cli(['sort', '--buffer-size', '7'], texts))
+            self.assertEqual((0, expected[::-1], ''), self.run_cli(['sort', '-r', '--buffer-size', '7'], texts))
+        finally:
+            cli.MERGE_FAN_IN = original_fan_in
+
+    def test_files(self):
+        first = self.write_file('first.txt', ['1.0.0', '', '0.1.0'])
+        second = self.write_file('second.txt', ['0.2.0'])
+        self.assertEqual(
+            (0, ['0.1.0', '0.2.0', '1.0.0', '3.0.0'], ''),
+            self.run_cli(['sort', first, '-', second], ['3.0.0']),
+        )
+
+    def test_options_after_arguments(self):
+        path = self.write_file('versions.txt', ['0.1.0', 'v2', '1.0.0-rc.1'])
+        status, output, errors = self.run_cli(['filter', '<1.0.0', '--skip-invalid', path])
+        self.assertEqual((0, ['0.1.0']), (status, output))
+        self.assertIn('skipped', errors)
+
+        path = self.write_file('valid.txt', ['0.1.0', '1.0.0-rc.1'])
+        self.assertEqual(
+            (0, ['1.0.0'], ''),
+            self.run_cli(['select', '>=1.0.0-beta <2', path, '--syntax', 'npm', '-'], ['1.0.0']),
+        )
+        self.assertEqual(
+            (0, ['1.0.0-rc.1', '0.1.0'], ''),
+            self.run_cli(['sort', path, '-r']),
+        )
+        with self.assertRaises(SystemExit):
+            self.run_cli(['filter', '<1.0.0', path, '--unknown'])
+
+    def test_filter(self):
+        self.assertEqual(
+            (0, ['0.1.0', '0.1.0+b1', '0.1.1', '0.10.0', '0.2.0'], ''),
+            self.run_cli(['filter', '<1.0.0'], self.versions),
+        )
+        self.assertEqual(
+            (0, ['1.0.0-rc.1', '1.0.0'], ''),
+            self.run_cli(['filter', '--syntax', 'npm', '>=1.0.0-beta <2'], self.versions),
+        )
+
+    def test_select(self):
+        self.assertEqual((0, ['0.10.0'], ''), self.run_cli(['select', '<1.0.0'], ['0.1.0', '0.10.0', '1.0.0']))
+        self.assertEqual((0, ['1.0.0'], ''), self.run_cli(['select', '--syntax', 'npm', '1.x'], self.versions))
+        self.assertEqual((1, [], ''), self.run_cli(['select', '>3'], self.versions))
+
+    def test_validate(self):
+        self.assertEqual((0, [], ''), self.run_cli(['validate'], self.versions))
+        self.assertEqual(
+            (1, ['<stdin>:2: 1.0', '<stdin>:4: 1.0.0-01'], ''),
+            self.run_cli(['validate'], ['1.0.0', '1.0', '', '1.0.0-01']),
+        )
+
+    def test_coerce(self):
+        self.assertEqual(
+            (0, ['1.0.0', '1.2.3+4', '2.0.0-rc1'], ''),
+            self.run_cli(['coerce'], ['1', '1.2.3.4', '2.0rc1']),
+        )
+
+    def test_invalid_input(self):
+        status, output, errors = self.run_cli(['filter', '>=1.0.0'], ['1.0.0', 'v2', '2.0.0'])
+        self.assertEqual((2, ['1.0.0']), (status, output))
+        self.assertIn('<stdin>:2: ', errors)
+
+        status, output, errors = self.run_cli(['filter', '>=1.0.0', '--skip-invalid'], ['1.0.0', 'v2', '2.0.0'])
+        self.assertEqual((0, ['1.0.0', '2.0.0']), (status, output))
+        self.assertIn('<stdin>:2: skipped', errors)
+
+    def test_invalid_spec(self):
+        status, output, errors = self.run_cli(['filter', '>>1.0.0'], self.versions)
+        self.assertEqual((2, []), (status, output))
+        self.assertIn('>>1.0.0', errors)
+
+    def test_stats(self):
+        status, _output, errors = self.run_cli(['--stats', 'validate'], self.versions)
+        self.assertEqual(0, status)
+        self.assertRegex(errors, r'^validate: 9 lines in [0-9.]+s \([0-9]+ lines/s\)\n$')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
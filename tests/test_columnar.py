@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Test the columnar VersionArray."""
+
+import itertools
+import unittest
+import sys
+
+from semantic_version import base, columnar
+
+
+class PurePythonVersionArrayTestCase(unittest.TestCase):
+    if sys.version_info[0] <= 2:
+        import contextlib
+
+        @contextlib.contextmanager
+        def subTest(self, **kwargs):
+            yield
+
+    use_numpy = False
+
+    versions = [
+        '2.0.0', '0.1.0', '0.1.0+b1', '0.1.0+b2', '0.1.1-rc.1', '0.1.1', '0.1.2-rc.1',
+        '0.1.2-rc.1+b1', '0.1.2', '0.1.2+b1', '0.2.0-rc.1', '0.2.0-rc.10', '0.2.0-rc.2',
+        '0.2.0', '1.0.0-0', '1.0.0-alpha', '1.0.0', '0.1.0+01', '0.1.0+1',
+    ]
+
+    targets = ['0.0.1', '0.1.0', '0.1.0+b1', '0.1.2-rc.1', '0.1.2-rc.5', '0.2.0-rc.10', '1.0.0-1', '3.0.0']
+
+    specs = [
+        ('simple', '*'),
+        ('simple', '>=0.1.1'),
+        ('simple', '<0.2.0'),
+        ('simple', '<0.2.0-'),
+        ('simple', '==0.1.0+b1'),
+        ('simple', '!=0.1.0+b1'),
+        ('simple', '^0.1.0'),
+        ('npm', '>=0.1.2-rc.1 <0.2.0'),
+        ('npm', '<0.1.1 || 1.x'),
+        ('npm', '^0.2.0-rc.2'),
+    ]
+
+    def setUp(self):
+        self.array = columnar.VersionArray(self.versions, use_numpy=self.use_numpy)
+
+    def test_columns(self):
+        self.assertEqual(len(self.versions), len(self.array))
+        self.assertEqual(self.versions, [str(version) for version in self.array])
+        self.assertEqual(base.Version('0.1.2-rc.1+b1'), self.array[7])
+        self.assertEqual(('rc', '1'), self.array.prereleases[self.array.prerelease_ids[7]])
+        self.assertEqual(('b1',), self.array.builds[self.array.build_ids[7]])
+
+    def test_from_versions(self):
+        array = columnar.VersionArray(
+            (base.Version(text) for text in self.versions),
+            use_numpy=self.use_numpy,
+        )
+        self.assertEqual(list(self.array), list(array))
+
+    def test_argsort(self):
+        versions = list(self.array)
+        self.assertEqual(
+            sorted(versions, key=lambda v: v.precedence_key),
+            [versions[i] for i in self.array.argsort()],
+        )
+
+    def test_compare(self):
+        for target, operator in itertools.product(self.targets, ['lt', 'le', 'eq', 'ne', 'gt', 'ge']):
+            with self.subTest(target=target, operator=operator):
+                version = base.Version(target)
+                method = '__%s__' % operator
+                self.assertEqual(
+                    [getattr(v, method)(version) for v in self.array],
+                    list(getattr(self.array, method)(version)),
+                )
+
+    def test_compare_invalid(self):
+        with self.assertRaises(TypeError):
+            self.array < '1.0.0'
+
+    def test_match(self):
+        for syntax, text in self.specs:
+            with self.subTest(spec=text):
+                spec = base.BaseSpec.parse(text, syntax=syntax)
+                self.assertEqual(
+                    [spec.match(version) for version in self.array],
+                    list(self.array.match(spec)),
+                )
+
+    def test_empty(self):
+        array = columnar.VersionArray(use_numpy=self.use_numpy)
+        self.assertEqual(0, len(array))
+        self.assertEqual([], list(array.argsort()))
+        self.assertEqual([], list(array.match(base.SimpleSpec('*'))))
+        self.assertEqual([], list(array == base.Version('1.0.0')))
+
+    def test_partial(self):
+        with self.assertRaises(ValueError):
+            columnar.VersionArray([base.Version('1.2', partial=True)], use_numpy=self.use_numpy)
+
+
+@unittest.skipIf(columnar.numpy is None, "NumPy is not installed")
+class NumpyVersionArrayTestCase(PurePythonVersionArrayTestCase):
+    use_numpy = True
+
+    def test_numpy_columns(self):
+        self.assertEqual('int64', self.array.major.dtype.name)
+        self.assertEqual('bool', self.array.match(base.SimpleSpec('*')).dtype.name)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
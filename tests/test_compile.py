@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Test the compilation of specs into interval sets."""
+
+import itertools
+import unittest
+import sys
+
+from semantic_version import base
+
+
+def key(text):
+    return base.Version(text)._cmp_key
+
+
+def lowest(text):
+    """The lowest precedence key of a release."""
+    return key(text)[:3] + ((),)
+
+
+class CompileTestCase(unittest.TestCase):
+    if sys.version_info[0] <= 2:
+        import contextlib
+
+        @contextlib.contextmanager
+        def subTest(self, **kwargs):
+            yield
+
+    def test_simple_range(self):
+        compiled = base.SimpleSpec('>=1.2.0,<2.0.0').compile()
+        self.assertEqual((base.Interval(key('1.2.0'), key('2.0.0')),), compiled.releases)
+        # <2.0.0 excludes 2.0.0 prereleases
+        self.assertEqual((base.Interval(lowest('1.2.1'), lowest('2.0.0')),), compiled.prereleases)
+
+    def test_npm_prereleases(self):
+        compiled = base.NpmSpec('>=1.2.3-beta <1.3.0').compile()
+        self.assertEqual((base.Interval(key('1.2.3'), key('1.3.0')),), compiled.releases)
+        # Only prereleases of 1.2.3 may match
+        self.assertEqual((base.Interval(key('1.2.3-beta'), lowest('1.2.4')),), compiled.prereleases)
+
+    def test_strict_build(self):
+        compiled = base.SimpleSpec('!=1.2.3+b4').compile()
+        self.assertEqual(
+            (
+                base.Interval(None, key('1.2.3')),
+                base.Interval(key('1.2.3'), key('1.2.3'), True, True, base.BuildSet([('b4',)], exclude=True)),
+                base.Interval(key('1.2.4'), None),
+            ),
+            compiled.releases,
+        )
+        self.assertEqual((base.Interval(),), compiled.prereleases)
+
+    def test_merge(self):
+        compiled = base.NpmSpec('1.x || >=1.5.0 <3.0.0 || 2.x').compile()
+        self.assertEqual((base.Interval(key('1.0.0'), key('3.0.0')),), compiled.releases)
+
+    def test_empty(self):
+        self.assertTrue(base.SimpleSpec('>=1.2.0,<1.2.0').compile().is_empty())
+        self.assertTrue(base.SimpleSpec('==1.2.3+b1,==1.2.3+b2').compile().is_empty())
+        self.assertFalse(base.SimpleSpec('>=1.2.0,<=1.2.0').compile().is_empty())
+        self.assertEqual(base.IntervalSet(), base.SimpleSpec('>1.2.0,<1.2.1').compile())
+
+    def test_cached(self):
+        spec = base.SimpleSpec('>=1.2.0')
+        self.assertIs(spec.compile(), spec.compile())
+
+    specs = [
+        ('simple', '*'),
+        ('simple', '>=0.1.1'),
+        ('simple', '>=0.1.1-'),
+        ('simple', '>0.1.1-rc.1'),
+        ('simple', '<0.2.0'),
+        ('simple', '<0.2.0-'),
+        ('simple', '<=0.2.0-rc.1'),
+        ('simple', '==0.1.*'),
+        ('simple', '==0.1.2'),
+        ('simple', '==0.1.2+'),
+        ('simple', '==0.1.2+b1'),
+        ('simple', '!=0.1.2'),
+        ('simple', '!=0.1.2-'),
+        ('simple', '!=0.1.2+'),
+        ('simple', '!=0.1.2-rc.1'),
+        ('simple', '!=0.1.*'),
+        ('simple', '^0.1.2'),
+        ('simple', '~0.1'),
+        ('simple', '~=0.1.2'),
+        ('simple', '>=0.1.0-,!=0.1.2-rc.1,!=0.1.0+b1,<0.2.0'),
+        ('npm', '*'),
+        ('npm', '0.1.x'),
+        ('npm', '>=0.1.2-rc.1'),
+        ('npm', '>0.1.2-rc.1 <0.2.0'),
+        ('npm', '<=0.2.0-rc.1'),
+        ('npm', '^0.1.2-rc.1'),
+        ('npm', '~0.1.2'),
+        ('npm', '0.1.1 - 0.2.0-rc.1'),
+        ('npm', '<0.1.0 || >=0.1.2 <0.2.0 || 1.x'),
+        ('npm', '=0.1.2+b1'),
+    ]
+
+    versions = [
+        '0.0.9', '0.1.0-rc.1', '0.1.0', '0.1.0+b1', '0.1.0+b2', '0.1.1-rc.1', '0.1.1',
+        '0.1.2-rc.0', '0.1.2-rc.1', '0.1.2-rc.1+b1', '0.1.2-rc.2', '0.1.2', '0.1.2+b1',
+        '0.1.3-alpha', '0.1.3', '0.2.0-rc.1', '0.2.0-rc.2', '0.2.0', '0.2.1', '1.0.0-0',
+        '1.0.0', '1.2.3+b1', '2.0.0',
+    ]
+
+    def test_match(self):
+        """Compiled specs match the same versions as their clauses."""
+        for (syntax, text), version_text in itertools.product(self.specs, self.versions):
+            with self.subTest(spec=text, syntax=syntax, version=version_text):
+                spec = base.BaseSpec.parse(text, syntax=syntax)
+                version = base.Version(version_text)
+                self.assertEqual(spec.clause.match(version), spec.compile().match(version))
+
+    def test_algebra(self):
+        for (syntax_a, text_a), (syntax_b, text_b) in itertools.combinations(self.specs, 2):
+            spec_a = base.BaseSpec.parse(text_a, syntax=syntax_a)
+            spec_b = base.BaseSpec.parse(text_b, syntax=syntax_b)
+            union = spec_a.compile() | spec_b.compile()
+            intersection = spec_a.compile() & spec_b.compile()
+            for version_text in self.versions:
+                with self.subTest(a=text_a, b=text_b, version=version_text):
+                    version = base.Version(version_text)
+                    self.assertEqual(spec_a.match(version) or spec_b.match(version), union.match(version))
+                    self.assertEqual(spec_a.match(version) and spec_b.match(version), intersection.match(version))
+
+    def test_complement(self):
+        for syntax, text in self.specs:
+            spec = base.BaseSpec.parse(text, syntax=syntax)
+            complement = ~spec.compile()
+            self.assertEqual(spec.compile(), ~complement)
+            for version_text in self.versions:
+                with self.subTest(spec=text, version=version_text):
+                    version = base.Version(version_text)
+                    self.assertEqual(not spec.match(version), complement.match(version))
+
+    def test_byte_ranges(self):
+        def in_ranges(ranges, data):
+            return any(start <= data and (stop is None or data < stop) for start, stop in ranges)
+
+        for syntax, text in self.specs:
+            ranges = base.BaseSpec.parse(text, syntax=syntax).compile().byte_ranges()
+            for (_start, stop), (next_start, _stop) in zip(ranges, ranges[1:]):
+                self.assertLess(stop, next_start)
+
+            spec = base.BaseSpec.parse(text, syntax=syntax)
+            for version_text in self.versions:
+                with self.subTest(spec=text, version=version_text):
+                    version = base.Version(version_text)
+                    if spec.match(version):
+                        self.assertTrue(in_ranges(ranges, version.to_sortable_bytes()))
+
+    def test_layer_byte_ranges(self):
+        """Ranges of a single layer are exact for versions of that layer."""
+        def in_ranges(ranges, data):
+            return any(start <= data and (stop is None or data < stop) for start, stop in ranges)
+
+        for syntax, text in self.specs:
+            spec = base.BaseSpec.parse(text, syntax=syntax)
+            release_ranges = spec.compile().byte_ranges(prereleases=False)
+            prerelease_ranges = spec.compile().byte_ranges(releases=False)
+            for version_text in self.versions:
+                with self.subTest(spec=text, version=version_text):
+                    version = base.Version(version_text)
+                    ranges = prerelease_ranges if version.prerelease else release_ranges
+                    self.assertEqual(spec.match(version), in_ranges(ranges, version.to_sortable_bytes()))
+
+    def test_exact_byte_ranges(self):
+        ranges = base.SimpleSpec('>=0.1.0-rc.1').compile().byte_ranges()
+        self.assertEqual([(base.Version('0.1.0-rc.1').to_sortable_bytes()[:-1], None)], ranges)
+
+        ranges = base.SimpleSpec('==0.1.2+b1').compile().byte_ranges()
+        data = base.Version('0.1.2+b1').to_sortable_bytes()
+        self.assertEqual([(data, data + b'\x00')], ranges)
+
+    def test_matcher(self):
+        """Generated matchers match the same versions as their clauses."""
+        specs = self.specs + [
+            ('npm', ' || '.join('%d.%d.x' % (major, minor) for major in range(3) for minor in range(0, 4, 2))),
+            ('npm', '=0.1.2+b1 || =0.1.0+b2 || 0.1.1 || 0.2.x || 1.0.0-0 || >=2.0.0'),
+            ('simple', '>=18446744073709551616.0.0,<18446744073709551616.1.18446744073709551616'),
+        ]
+        versions = self.versions + [
+            '18446744073709551616.0.0', '18446744073709551616.1.0', '1.18446744073709551616.0', '1.1.1-rc.1+b2',
+        ]
+        for syntax, text in specs:
+            spec = base.BaseSpec.parse(text, syntax=syntax)
+            matcher = spec.matcher()
+            self.assertIs(matcher, spec.matcher())
+            for version_text in versions:
+                with self.subTest(spec=text, version=version_text):
+                    version = base.Version(version_text)
+                    self.assertEqual(spec.clause.match(version), matcher(version))
+
+    def test_spec_operations(self):
+        for (syntax_a, text_a), (syntax_b, text_b) in itertools.combinations(self.specs, 2):
+            spec_a = base.BaseSpec.parse(text_a, syntax=syntax_a)
+            spec_b = base.BaseSpec.parse(text_b, syntax=syntax_b)
+            union = spec_a.union(spec_b)
+            intersection = spec_a.intersection(spec_b.compile())
+            matches_a = [v for v in self.versions if spec_a.match(base.Version(v))]
+            matches_b = [v for v in self.versions if spec_b.match(base.Version(v))]
+            with self.subTest(a=text_a, b=text_b):
+                self.assertEqual(union, spec_b.union(spec_a))
+                self.assertEqual(intersection, spec_b.intersection(spec_a))
+                self.assertEqual(
+                    [v for v in self.versions if v in matches_a or v in matches_b],
+                    [v for v in self.versions if union.match(base.Version(v))],
+                )
+                self.assertEqual(
+                    [v for v in self.versions if v in matches_a and v in matches_b],
+                    [v for v in self.versions if intersection.match(base.Version(v))],
+                )
+                if spec_a.is_subset(spec_b):
+                    self.assertTrue(set(matches_a) <= set(matches_b))
+                self.assertEqual(spec_a.is_subset(spec_b), spec_a.union(spec_b) == spec_b.compile())
+
+    def test_emptiness(self):
+        self.assertTrue(base.SimpleSpec('>=2.0.0,<1.0.0').is_empty())
+        self.assertFalse(base.SimpleSpec('>=1.0.0,<=1.0.0').is_empty())
+        caret = base.NpmSpec('^1.2.0')
+        self.assertTrue(caret.intersection(base.SimpleSpec('>=1.5.0'), base.NpmSpec('~1.4')).is_empty())
+        self.assertFalse(caret.intersection(base.SimpleSpec('>=1.5.0'), base.NpmSpec('1.x')).is_empty())
+
+        self.assertTrue(base.NpmSpec('~1.2.3').is_subset(base.NpmSpec('^1.2.0')))
+        self.assertFalse(base.NpmSpec('^1.2.0').is_subset(base.NpmSpec('~1.2.3')))
+        self.assertTrue(base.SimpleSpec('>=2.0.0,<1.0.0').is_subset(base.NpmSpec('1.x')))
+
+    def test_simplify(self):
+        """Simplified clauses match the same versions as the original ones."""
+        for syntax, text in self.specs:
+            spec = base.BaseSpec.parse(text, syntax=syntax)
+            simplified = spec.clause.simplify()
+            self.assertEqual(spec.compile(), simplified.compile())
+            for version_text in self.versions:
+                with self.subTest(spec=text, version=version_text):
+                    version = base.Version(version_text)
+                    self.assertEqual(spec.clause.match(version), simplified.match(version))
+
+    def test_simplify_minimal(self):
+        examples = [
+            ('simple', '^1.2.0,>=1.0.0,<5', 'simple', '>=1.2.0,<2.0.0'),
+            ('simple', '>=1.0.0,<=1.0.0,==1.0.0', 'simple', '==1.0.0'),
+            ('npm', '^1.0.0 || ^2.0.0', 'npm', '>=1.0.0 <3.0.0'),
+            ('npm', '^1.2.3 || ~1.3.0', 'npm', '^1.2.3'),
+        ]
+        for syntax, text, expected_syntax, expected in examples:
+            with self.subTest(spec=text):
+                self.assertEqual(
+                    base.BaseSpec.parse(expected, syntax=expected_syntax).clause.simplify(),
+                    base.BaseSpec.parse(text, syntax=syntax).clause.simplify(),
+                )
+
+        self.assertEqual(base.Never(), base.SimpleSpec('>1.0.0,<1.0.0').clause.simplify())
+        self.assertEqual(base.Never(), base.SimpleSpec('<0.0.0').clause.simplify())
+        target = base.Version('1.0.0')
+        self.assertEqual(base.Always(), base.AnyOf(
+            base.Range(base.Range.OP_LT, target, prerelease_policy=base.Range.PRERELEASE_ALWAYS),
+            base.Range(base.Range.OP_GTE, target),
+        ).simplify())
+
+    def test_simplify_many_alternatives(self):
+        """Simplifying N alternatives combines their interval sets O(N) times."""
+        calls = []
+        original_or, original_and = base.IntervalSet.__or__, base.IntervalSet.__and__
+
+        def counted(combine):
+            def wrapper(first, second):
+                calls.append(combine)
+                return combine(first, second)
+            return wrapper
+
+        base.IntervalSet.__or__ = counted(original_or)
+        base.IntervalSet.__and__ = counted(original_and)
+        try:
+            disjoint = base.NpmSpec(' || '.join('>=%d.0.0 <%d.5.0' % (i, i) for i in range(100)))
+            del calls[:]
+            simplified = disjoint.clause.simplify()
+            self.assertLess(len(calls), 50 * 100)
+            self.assertEqual(100, len(simplified.clauses))
+
+            adjacent = base.NpmSpec(' || '.join('%d.x' % i for i in range(100)))
+            del calls[:]
+            simplified = adjacent.clause.simplify()
+            self.assertLess(len(calls), 50 * 100)
+        finally:
+            base.IntervalSet.__or__, base.IntervalSet.__and__ = original_or, original_and
+
+        self.assertEqual(disjoint.compile(), disjoint.clause.simplify().compile())
+        self.assertEqual(base.NpmSpec('>=0.0.0 <100.0.0').clause.simplify(), simplified)
+
+    def test_semantic_equality(self):
+        self.assertEqual(base.SimpleSpec('^1.2.0,>=1.0.0,<5'), base.SimpleSpec('>=1.2.0,<2.0.0'))
+        self.assertEqual(base.NpmSpec('1.x || 2.x'), base.NpmSpec('>=1.0.0 <3.0.0'))
+        self.assertEqual(base.SimpleSpec('<1.0.1'), base.SimpleSpec('<=1.0.0'))
+        self.assertNotEqual(base.SimpleSpec('<1.0.0'), base.SimpleSpec('<1.0.0-'))
+        # NPM ranges exclude prereleases.
+        self.assertEqual(2, len(set([
+            base.SimpleSpec('>=1.2.0,<2.0.0'), base.SimpleSpec('^1.2.0'),
+            base.NpmSpec('>=1.2.0 <2.0.0'), base.NpmSpec('^1.2.0'),
+        ])))
+
+    def test_custom_clause(self):
+        class OddPatch(base.Matcher):
+            def match(self, version):
+                return bool(version.patch % 2)
+
+        class OddSpec(base.BaseSpec):
+            SYNTAX = 'odd'
+
+            @classmethod
+            def _parse_to_clause(cls, expression):
+                return OddPatch()
+
+        spec = OddSpec('odd')
+        with self.assertRaises(NotImplementedError):
+            spec.compile()
+        self.assertTrue(spec.match(base.Version('1.2.3')))
+        self.assertFalse(spec.match(base.Version('1.2.4')))
+        self.assertTrue(spec.matcher()(base.Version('1.2.3')))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
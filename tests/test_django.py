@@ -4,7 +4,7 @@
 
 import unittest
 
-from semantic_version import Version, SimpleSpec, NpmSpec
+from semantic_version import base, Version, SimpleSpec, NpmSpec
 
 from .setup_django import django_loaded
 
@@ -14,8 +14,10 @@ if django_loaded:  # pragma: no cover
     from .django_test_app import models
 
     from django.core import serializers
+    from django.core.exceptions import FieldError
     from django.core.management import call_command
-    from django.db import connection
+    from django.db import NotSupportedError, connection, transaction
+    from django.db.models import Max, Min
     from django.test import TestCase as DjangoTestCase
     from django.test import TransactionTestCase
     from django.test import runner as django_test_runner
@@ -209,6 +211,57 @@ class DjangoFieldTestCase(unittest.TestCase):
         self.assertEqual(o2.optional, obj2.object.optional)
 
 
+@unittest.skipIf(not django_loaded, "Django not installed")
+class FieldParseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = base.LRUCache(maxsize=10)
+        self.default_cache = django_fields.SemVerField.parse_cache
+        django_fields.SemVerField.parse_cache = self.cache
+
+    def tearDown(self):
+        django_fields.SemVerField.parse_cache = self.default_cache
+
+    def test_version(self):
+        field = django_fields.VersionField()
+        first = field.from_db_value('0.1.1-rc.1', None, None)
+        second = field.from_db_value('0.1.1-rc.1', None, None)
+        self.assertEqual(Version('0.1.1-rc.1'), first)
+        self.assertIs(first, second)
+        self.assertEqual(base.CacheInfo(hits=1, misses=1, maxsize=10, currsize=1), self.cache.cache_info())
+
+    def test_spec(self):
+        field = django_fields.SpecField(syntax='npm')
+        first = field.to_python('^1.2.0 || 2.x')
+        self.assertEqual(NpmSpec('^1.2.0 || 2.x'), first)
+        self.assertIs(first, field.to_python('^1.2.0 || 2.x'))
+        self.assertEqual(SimpleSpec('<1.2.0'), django_fields.SpecField().to_python('<1.2.0'))
+
+    def test_field_settings(self):
+        self.assertEqual(Version('1.2.0'), django_fields.VersionField(coerce=True).to_python('1.2'))
+        with self.assertRaises(ValueError):
+            django_fields.VersionField().to_python('1.2')
+        self.assertEqual(0, self.cache.hits)
+
+    def test_invalid_not_cached(self):
+        field = django_fields.VersionField()
+        for _i in range(2):
+            with self.assertRaises(ValueError):
+                field.to_python('v1')
+        self.assertEqual(0, len(self.cache))
+
+    def test_disabled(self):
+        field = django_fields.VersionField()
+        field.parse_cache = None
+        self.assertIsNot(field.to_python('1.2.3'), field.to_python('1.2.3'))
+        self.assertEqual(0, len(self.cache))
+
+    def test_version_key(self):
+        field = models.SortableVersionModel._meta.get_field('version_key')
+        key = field.get_prep_value(Version('1.2.3+b1'))
+        self.assertEqual(Version('1.2.3+b1'), field.from_db_value(key, None, None))
+        self.assertIs(field.from_db_value(key, None, None), field.from_db_value(key, None, None))
+
+
 @unittest.skipIf(not django_loaded, "Django not installed")
 class FieldMigrationTests(DjangoTestCase):
     def test_version_field(self):
@@ -223,6 +276,32 @@ class FieldMigrationTests(DjangoTestCase):
         }
         self.assertEqual(field.deconstruct()[3], expected)
 
+    def test_sortable_version_field(self):
+        field = django_fields.VersionField(sortable=True)
+        expected = {
+            'coerce': False,
+            'partial': False,
+            'sortable': True,
+            'max_length': 200,
+        }
+        self.assertEqual(field.deconstruct()[3], expected)
+
+        with self.assertRaises(ValueError):
+            django_fields.VersionField(sortable=True, partial=True)
+
+    def test_version_key_field(self):
+        field = models.SortableVersionModel._meta.get_field('version_key')
+        self.assertIsInstance(field, django_fields.VersionKeyField)
+        expected = {
+            'source': 'version',
+            'blank': True,
+            'db_index': True,
+            'editable': False,
+            'max_length': 800,
+            'null': True,
+        }
+        self.assertEqual(field.deconstruct()[3], expected)
+
     def test_spec_field(self):
         field = django_fields.SpecField()
         expected = {'max_length': 200}
@@ -275,3 +354,175 @@ class DbInteractingTestCase(DjangoTestCase):
         self.assertEqual(o1.pk, o2.pk)
         self.assertEqual(Version('0.1.1'), o2.version)
         self.assertEqual(SimpleSpec('==0.4.3'), o2.spec)
+
+
+@unittest.skipIf(not django_loaded, "Django not installed")
+class SortableVersionFieldTestCase(DjangoTestCase):
+    versions = ['1.10.0', '1.9.0', '1.10.0-rc.1', '0.2.0+b1', '1.10.0-rc.10', '2.0.0', '1.10.0-rc.2']
+
+    def setUp(self):
+        for version in self.versions:
+            models.SortableVersionModel.objects.create(version=Version(version), coerced=version)
+
+    def test_key(self):
+        obj = models.SortableVersionModel.objects.get(version='1.10.0-rc.1')
+        self.assertEqual(Version('1.10.0-rc.1'), obj.version)
+        self.assertEqual(Version('1.10.0-rc.1'), obj.version_key)
+        key = models.SortableVersionModel._meta.get_field('version_key').get_prep_value(obj.version)
+        self.assertEqual(Version('1.10.0-rc.1').to_sortable_bytes(), bytes(bytearray.fromhex(key[:-1])))
+        self.assertEqual(django_fields.PRERELEASE_KEY_SUFFIX, key[-1])
+
+    def test_order_by(self):
+        expected = sorted(Version(version) for version in self.versions)
+        queryset = models.SortableVersionModel.objects.order_by('version')
+        self.assertIn('version_key', str(queryset.query))
+        self.assertEqual(expected, [obj.version for obj in queryset])
+        self.assertEqual(expected[::-1], list(queryset.reverse().values_list('version', flat=True)))
+
+    def test_aggregate(self):
+        self.assertEqual(
+            {'version__max': Version('2.0.0'), 'version__min': Version('0.2.0+b1')},
+            models.SortableVersionModel.objects.aggregate(Max('version'), Min('version')),
+        )
+
+    def test_range_filter(self):
+        queryset = models.SortableVersionModel.objects.filter(
+            version__gte=Version('1.10.0-rc.2'), version__lt='2.0.0',
+        ).order_by('version')
+        self.assertEqual(
+            [Version('1.10.0-rc.2'), Version('1.10.0-rc.10'), Version('1.10.0')],
+            [obj.version for obj in queryset],
+        )
+        self.assertEqual(
+            [Version('1.9.0'), Version('2.0.0')],
+            [obj.coerced for obj in models.SortableVersionModel.objects.filter(
+                coerced__in=['1.9', '2'],
+            ).order_by('-version')][::-1],
+        )
+
+    def test_text_lookups(self):
+        with self.assertRaises(FieldError):
+            models.SortableVersionModel.objects.filter(version__startswith='1.')
+
+    def test_update(self):
+        queryset = models.SortableVersionModel.objects.filter(version='1.9.0')
+        with self.assertRaises(FieldError), transaction.atomic():
+            queryset.update(version=Version('3.0.0'))
+        queryset.update(version=Version('3.0.0'), version_key=Version('3.0.0'))
+        obj = models.SortableVersionModel.objects.order_by('version').last()
+        self.assertEqual(Version('3.0.0'), obj.version)
+
+    def test_bulk_update(self):
+        objs = list(models.SortableVersionModel.objects.order_by('pk'))
+        for obj in objs:
+            obj.version = obj.version.next_major()
+        with self.assertRaises(FieldError), transaction.atomic():
+            models.SortableVersionModel.objects.bulk_update(objs, ['version'])
+        models.SortableVersionModel.objects.bulk_update(objs, ['version', 'version_key'])
+        self.assertEqual(
+            sorted(Version(version).next_major() for version in self.versions),
+            list(models.SortableVersionModel.objects.order_by('version').values_list('version_key', flat=True)),
+        )
+
+    def test_save_update_fields(self):
+        obj = models.SortableVersionModel.objects.get(version='1.9.0')
+        obj.version = Version('3.0.0')
+        with self.assertRaises(FieldError), transaction.atomic():
+            obj.save(update_fields=['version'])
+        obj.save(update_fields=['version', 'version_key'])
+        self.assertEqual(obj.pk, models.SortableVersionModel.objects.get(version__gt='2.0.0').pk)
+
+        # Loading the version loads the key as well.
+        obj = models.SortableVersionModel.objects.only('version').get(pk=obj.pk)
+        obj.version = Version('4.0.0')
+        obj.save()
+        self.assertEqual(obj.pk, models.SortableVersionModel.objects.get(version__gt='3.0.0').pk)
+
+    def test_update_sort_keys(self):
+        models.SortableVersionModel.objects.update(version_key=None)
+        self.assertFalse(models.SortableVersionModel.objects.filter(version__gte='0.0.0').exists())
+        # Rows without a key read their text.
+        self.assertEqual(
+            sorted(Version(version) for version in self.versions),
+            sorted(models.SortableVersionModel.objects.values_list('version', flat=True)),
+        )
+        obj = models.SortableVersionModel.objects.get(pk=models.SortableVersionModel.objects.first().pk)
+        obj.save()
+        self.assertEqual(obj.version, models.SortableVersionModel.objects.get(version__gte='0.0.0').version)
+
+        field = models.SortableVersionModel._meta.get_field('version')
+        self.assertEqual(len(self.versions), field.update_sort_keys(batch_size=2))
+        self.assertEqual(
+            sorted(Version(version) for version in self.versions),
+            list(models.SortableVersionModel.objects.order_by('version').values_list('version', flat=True)),
+        )
+
+    def test_serialization(self):
+        data = serializers.serialize('json', models.SortableVersionModel.objects.order_by('pk'))
+        objects = [obj.object for obj in serializers.deserialize('json', data)]
+        self.assertEqual([Version(version) for version in self.versions], [obj.version for obj in objects])
+        self.assertEqual([Version(version) for version in self.versions], [obj.version_key for obj in objects])
+
+    def test_matches(self):
+        specs = [
+            SimpleSpec('^1.9'), SimpleSpec('>=1.10.0-rc.2,<2.0.0'), SimpleSpec('<1.10.0'), SimpleSpec('==0.2.0+b1'),
+            SimpleSpec('>=1.9.0,!=1.10.0'), SimpleSpec('>=3'), SimpleSpec('*'),
+            NpmSpec('>=1.10.0-rc.2 <2'), NpmSpec('1.x || >=2.0.0'), NpmSpec('*'),
+        ]
+        for spec in specs:
+            with self.subTest(spec=spec):
+                expected = sorted(spec.filter(Version(version) for version in self.versions))
+                queryset = models.SortableVersionModel.objects.filter(version__matches=spec).order_by('version')
+                self.assertEqual(expected, [obj.version for obj in queryset])
+
+        self.assertEqual(
+            [Version('1.9.0')],
+            list(models.SortableVersionModel.objects.filter(coerced__matches='>=1.9,<1.10').values_list(
+                'coerced', flat=True,
+            )),
+        )
+
+    def test_matches_custom_spec(self):
+        class OddMinor(base.Matcher):
+            def match(self, version):
+                return bool(version.minor % 2)
+
+        class OddMinorSpec(base.BaseSpec):
+            @classmethod
+            def _parse_to_clause(cls, expression):
+                return OddMinor()
+
+        queryset = models.SortableVersionModel.objects.filter(version__matches=OddMinorSpec('odd'))
+        self.assertEqual([Version('1.9.0')], [obj.version for obj in queryset])
+        self.assertFalse(models.SortableVersionModel.objects.filter(
+            version__matches=OddMinorSpec('odd'), version__gt='1.9.0',
+        ).exists())
+
+        class AnyVersion(base.Matcher):
+            def match(self, version):
+                return True
+
+        class AnyVersionSpec(base.BaseSpec):
+            @classmethod
+            def _parse_to_clause(cls, expression):
+                return AnyVersion()
+
+        original_size = django_fields.MATCHES_IN_LIST_SIZE
+        django_fields.MATCHES_IN_LIST_SIZE = 2
+        try:
+            queryset = models.SortableVersionModel.objects.filter(version__matches=AnyVersionSpec('any'))
+            self.assertEqual(4, str(queryset.query).count(' IN ('))
+            self.assertEqual(
+                sorted(Version(version) for version in self.versions),
+                list(queryset.order_by('version').values_list('version', flat=True)),
+            )
+        finally:
+            django_fields.MATCHES_IN_LIST_SIZE = original_size
+
+        original_max_params = connection.features.max_query_params
+        connection.features.max_query_params = len(self.versions) - 1
+        try:
+            with self.assertRaises(NotSupportedError):
+                list(models.SortableVersionModel.objects.filter(version__matches=AnyVersionSpec('any')))
+        finally:
+            connection.features.max_query_params = original_max_params
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Test lookups in a VersionIndex and a SpecSet."""
+
+import unittest
+import sys
+
+from semantic_version import base
+
+
+class VersionIndexTestCase(unittest.TestCase):
+    if sys.version_info[0] <= 2:
+        import contextlib
+
+        @contextlib.contextmanager
+        def subTest(self, **kwargs):
+            yield
+
+    versions = [
+        '2.0.0', '0.1.0', '0.1.0+b1', '0.1.0+b2', '0.1.1-rc.1', '0.1.1', '0.1.2-rc.1',
+        '0.1.2-rc.1+b1', '0.1.2', '0.1.2+b1', '0.2.0-rc.1', '0.2.0', '1.0.0-0', '1.0.0',
+    ]
+
+    specs = [
+        ('simple', '*'),
+        ('simple', '>=0.1.1'),
+        ('simple', '<0.2.0'),
+        ('simple', '<0.2.0-'),
+        ('simple', '==0.1.0+b1'),
+        ('simple', '!=0.1.0+b1'),
+        ('simple', '!=0.1.2'),
+        ('simple', '^0.1.0'),
+        ('simple', '>=3.0.0'),
+        ('npm', '>=0.1.2-rc.1 <0.2.0'),
+        ('npm', '<0.1.1 || 1.x'),
+        ('npm', '=0.1.2-rc.1+b1'),
+    ]
+
+    def setUp(self):
+        self.index = base.VersionIndex(base.Version(text) for text in self.versions)
+
+    def test_sorted(self):
+        self.assertEqual(len(self.versions), len(self.index))
+        keys = [v.precedence_key for v in self.index]
+        self.assertEqual(sorted(keys), keys)
+
+    def test_filter(self):
+        for syntax, text in self.specs:
+            with self.subTest(spec=text):
+                spec = base.BaseSpec.parse(text, syntax=syntax)
+                expected = sorted(
+                    (v for v in self.index if spec.clause.match(v)),
+                    key=lambda v: v.precedence_key,
+                )
+                self.assertEqual(
+                    [str(v) for v in expected],
+                    [str(v) for v in spec.filter(self.index)],
+                )
+
+    def test_select(self):
+        for syntax, text in self.specs:
+            with self.subTest(spec=text):
+                spec = base.BaseSpec.parse(text, syntax=syntax)
+                self.assertEqual(spec.select(list(self.index)), spec.select(self.index))
+
+        self.assertEqual('0.1.2', str(base.SimpleSpec('<0.2.0').select(self.index)))
+        self.assertIsNone(base.SimpleSpec('>=3.0.0').select(self.index))
+
+    def test_empty(self):
+        index = base.VersionIndex()
+        self.assertEqual([], list(base.SimpleSpec('*').filter(index)))
+        self.assertIsNone(base.SimpleSpec('*').select(index))
+
+    def test_partial(self):
+        with self.assertRaises(ValueError):
+            base.VersionIndex([base.Version('1.2', partial=True)])
+
+
+class MatchMatrixTestCase(unittest.TestCase):
+    def test_matrix(self):
+        versions = [base.Version(text) for text in VersionIndexTestCase.versions]
+        specs = [base.BaseSpec.parse(text, syntax=syntax) for syntax, text in VersionIndexTestCase.specs]
+        self.assertEqual(
+            [[i for i, version in enumerate(versions) if spec.clause.match(version)] for spec in specs],
+            base.match_matrix(specs, versions),
+        )
+
+    def test_uncompiled(self):
+        class Odd(base.Clause):
+            def match(self, version):
+                return version.patch % 2 == 1
+
+        odd = base.SimpleSpec('*')
+        odd.clause = Odd()
+        odd._compiled = None
+        versions = [base.Version(text) for text in ['0.1.3', '0.1.2', '0.1.1']]
+        self.assertEqual([[0, 2], [1, 2]], base.match_matrix([odd, base.SimpleSpec('<0.1.3')], versions))
+
+    def test_empty(self):
+        self.assertEqual([[]], base.match_matrix([base.SimpleSpec('*')], []))
+        self.assertEqual([], base.match_matrix([], [base.Version('1.0.0')]))
+
+    def test_partial(self):
+        with self.assertRaises(ValueError):
+            base.match_matrix([base.SimpleSpec('*')], [base.Version('0.1', partial=True)])
+
+
+class SpecSetTestCase(unittest.TestCase):
+    if sys.version_info[0] <= 2:
+        import contextlib
+
+        @contextlib.contextmanager
+        def subTest(self, **kwargs):
+            yield
+
+    def setUp(self):
+        self.specs = [
+            ('%s:%s' % (syntax, text), base.BaseSpec.parse(text, syntax=syntax))
+            for syntax, text in VersionIndexTestCase.specs
+        ]
+        self.spec_set = base.SpecSet(self.specs)
+
+    def test_match(self):
+        for text in VersionIndexTestCase.versions + ['0.0.1', '0.1.2+b2', '5.0.0', '5.0.0-rc.1']:
+            with self.subTest(version=text):
+                version = base.Version(text)
+                self.assertEqual(
+                    [key for key, spec in self.specs if spec.clause.match(version)],
+                    self.spec_set.match(version),
+                )
+
+    def test_mapping(self):
+        spec_set = base.SpecSet({'low': base.SimpleSpec('<1.0.0'), 'high': base.NpmSpec('>=1.0.0')})
+        self.assertEqual(2, len(spec_set))
+        self.assertEqual({'low', 'high'}, set(spec_set))
+        self.assertEqual(base.SimpleSpec('<1.0.0'), spec_set['low'])
+        self.assertEqual(['high'], spec_set.match(base.Version('1.2.0')))
+
+    def test_empty(self):
+        self.assertEqual([], base.SpecSet().match(base.Version('1.0.0')))
+
+    def test_partial(self):
+        with self.assertRaises(ValueError):
+            self.spec_set.match(base.Version('0.1', partial=True))
+
+    def test_uncompiled(self):
+        class Odd(base.Clause):
+            def match(self, version):
+                return version.patch % 2 == 1
+
+        odd = base.SimpleSpec('*')
+        odd.clause = Odd()
+        odd._compiled = None
+        spec_set = base.SpecSet([(1, base.SimpleSpec('<0.1.2')), (2, odd), (3, base.SimpleSpec('>=0.1.0'))])
+        self.assertEqual([1, 2, 3], spec_set.match(base.Version('0.1.1')))
+        self.assertEqual([3], spec_set.match(base.Version('0.1.2')))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
@@ -171,6 +171,52 @@ class MatchTestCase(unittest.TestCase):
         version = semantic_version.Version('0.1.1-rc1+4.2')
         self.assertTrue(version in spec, "%r should be in %r" % (version, spec))
 
+    def test_match_does_not_copy_versions(self):
+        specs = [
+            semantic_version.SimpleSpec('>=0.1.1,!=0.1.2,<0.2.0'),
+            semantic_version.SimpleSpec('==0.1.2+,!=0.1.3+b2,<0.1.4-'),
+            semantic_version.NpmSpec('>=0.1.1-alpha <0.1.4 || 2.x'),
+        ]
+        versions = [
+            semantic_version.Version(text)
+            for text in ['0.1.1', '0.1.2-rc1', '0.1.2', '0.1.3+b2', '0.1.4-a', '2.0.0+b1']
+        ]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("Matching versions should not build new versions.")
+
+        original_init = semantic_version.Version.__init__
+        semantic_version.Version.__init__ = fail
+        try:
+            for spec in specs:
+                for version in versions:
+                    spec.match(version)
+        finally:
+            semantic_version.Version.__init__ = original_init
+
+    def test_parse_does_not_validate_versions(self):
+        def fail(*args, **kwargs):
+            raise AssertionError("Spec targets should skip Version validation.")
+
+        original_init = semantic_version.Version.__init__
+        semantic_version.Version.__init__ = fail
+        try:
+            semantic_version.SimpleSpec('>=0.1.1-rc.1,!=0.1.2+b.2,<0.2,~=1.4,^2.0.0')
+            semantic_version.NpmSpec('>=0.1.1-alpha <0.1.4 || ^1.x || ~2.1.3-rc.1 || 3.0.0 - 3.2.0')
+        finally:
+            semantic_version.Version.__init__ = original_init
+
+    def test_invalid_target_identifiers(self):
+        for spec_class, expression in [
+                (semantic_version.SimpleSpec, '>=0.1.1-rc.01'),
+                (semantic_version.SimpleSpec, '==0.1.1-rc..1'),
+                (semantic_version.SimpleSpec, '==0.1.1+b..1'),
+                (semantic_version.NpmSpec, '>=0.1.1-rc.01'),
+        ]:
+            with self.subTest(spec=expression):
+                with self.assertRaises(ValueError):
+                    spec_class(expression)
+
 
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
@@ -4,6 +4,7 @@
 # This code is distributed under the two-clause BSD License.
 
 import itertools
+import random
 import unittest
 import sys
 
@@ -72,6 +73,55 @@ class ParsingTestCase(unittest.TestCase):
                 )
                 self.assertEqual(text, str(version))
 
+    def test_parse_many(self):
+        versions = semantic_version.Version.parse_many(self.valids)
+        self.assertEqual([semantic_version.Version(valid) for valid in self.valids], versions)
+        self.assertEqual(self.valids, [str(version) for version in versions])
+
+    def test_parse_many_errors(self):
+        # Invalid leading zeroes and empty identifiers are reported as well
+        invalids = self.invalids + ['01.2.3', '1.2.3-01', '1.2.3-rc..1', '1.2.3+']
+        mixed = list(itertools.chain.from_iterable(zip(self.valids, invalids))) + invalids[len(self.valids):]
+
+        with self.assertRaises(ValueError):
+            semantic_version.Version.parse_many(mixed)
+
+        self.assertEqual(
+            [semantic_version.Version(valid) for valid in self.valids],
+            semantic_version.Version.parse_many(mixed, errors='skip'),
+        )
+
+        versions, errors = semantic_version.Version.parse_many(mixed, errors='collect')
+        self.assertEqual(len(self.valids), len(versions))
+        self.assertEqual(invalids, [text for _position, text, _error in errors])
+        for position, text, error in errors:
+            with self.subTest(version=text):
+                self.assertIs(text, mixed[position])
+                self.assertIsInstance(error, ValueError)
+
+        with self.assertRaises(ValueError):
+            semantic_version.Version.parse_many(self.valids, errors='ignore')
+
+    def test_fast_path_conformance(self):
+        """The strict fast path agrees with the step by step parser."""
+        def outcome(parse, text):
+            try:
+                return parse(text)
+            except ValueError as e:
+                return str(e)
+
+        rnd = random.Random(42)
+        pieces = ['0', '00', '1', '01', '10', '9', '.', '.', '-', '+', 'a', 'Z', 'rc', '-', '_', '\n', '\u0661']
+        for _i in range(20000):
+            text = '%d.%d.%d' % (rnd.randint(0, 12), rnd.randint(0, 12), rnd.randint(0, 12))
+            position = rnd.randint(0, len(text))
+            text = text[:position] + ''.join(rnd.choice(pieces) for _j in range(rnd.randint(0, 6))) + text[position:]
+            with self.subTest(version=text):
+                self.assertEqual(
+                    outcome(semantic_version.Version._parse_checked, text),
+                    outcome(semantic_version.Version._parse, text),
+                )
+
 
 class ComparisonTestCase(unittest.TestCase):
     if sys.version_info[0] <= 2: